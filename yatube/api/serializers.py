@@ -0,0 +1,67 @@
+class FieldError(ValueError):
+    pass
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: _isoformat(post.pub_date),
+    'updated': lambda post: _isoformat(post.updated),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'comments_count': lambda post: post.comments_count,
+}
+
+GROUP_FIELDS = {
+    'id': lambda group: group.pk,
+    'slug': lambda group: group.slug,
+    'title': lambda group: group.title,
+    'description': lambda group: group.description,
+}
+
+
+def _profile_count(name, related):
+    """Счётчик профиля; без профиля (пользователь создан в обход
+    сигналов) записи считаются запросом."""
+    def field(user):
+        if hasattr(user, 'profile'):
+            return getattr(user.profile, name)
+        return getattr(user, related).count()
+    return field
+
+
+PROFILE_FIELDS = {
+    'username': lambda user: user.username,
+    'full_name': lambda user: user.get_full_name(),
+    'posts_count': _profile_count('posts_count', 'posts'),
+    'followers_count': _profile_count('followers_count', 'following'),
+    'following_count': _profile_count('following_count', 'follower'),
+}
+
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'post': lambda comment: comment.post_id,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: _isoformat(comment.created),
+}
+
+
+def parse_fields(raw, spec):
+    """Список полей из ?fields=a,b; пустой параметр - все поля."""
+    if not raw:
+        return list(spec)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in spec]
+    if unknown:
+        raise FieldError(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def serialize(obj, fields, spec):
+    return {name: spec[name](obj) for name in fields}
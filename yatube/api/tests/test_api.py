@@ -0,0 +1,167 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', description='Описание', slug='api-group'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}',
+                group=cls.group if i % 2 else None,
+            )
+            for i in range(5)
+        ]
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.reader, text=f'Комментарий {i}'
+            )
+            for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def get(self, name, *args, **params):
+        return self.client.get(reverse(f'api:{name}', args=args), params)
+
+    def walk(self, name, *args, **params):
+        """Все записи списка, проходя страницы по ссылкам next."""
+        response = self.get(name, *args, **params)
+        results = []
+        while True:
+            data = response.json()
+            results.extend(data['results'])
+            if not data['next']:
+                return results
+            response = self.client.get(data['next'])
+
+    def test_post_list_pages_by_cursor(self):
+        results = self.walk('post_list', limit=2)
+        self.assertEqual(
+            [post['id'] for post in results],
+            [post.id for post in reversed(self.posts)],
+        )
+        first = results[-1]
+        self.assertEqual(first['author'], 'author')
+        self.assertIsNone(first['group'])
+        self.assertEqual(first['comments_count'], 3)
+
+    def test_previous_link_goes_back(self):
+        first = self.get('post_list', limit=2).json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_sparse_fieldsets(self):
+        data = self.get('post_detail', self.posts[1].id,
+                        fields='id,group').json()
+        self.assertEqual(data, {'id': self.posts[1].id, 'group': 'api-group'})
+        response = self.get('post_list', fields='id,nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['detail'])
+
+    def test_batched_ids_keep_order_and_skip_missing(self):
+        ids = [self.posts[3].id, 100500, self.posts[0].id]
+        with self.assertNumQueries(1):
+            response = self.get('post_list', ids=','.join(map(str, ids)),
+                                fields='id')
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.posts[3].id}, {'id': self.posts[0].id}],
+        )
+        self.assertEqual(self.get('post_list', ids='1,x').status_code, 400)
+
+    @mock.patch('api.views.API_MAX_PAGE_SIZE', 2)
+    def test_too_many_ids(self):
+        response = self.get('post_list', ids='1,2,3')
+        self.assertEqual(response.status_code, 400)
+
+    def test_group_and_profile_listings(self):
+        group_posts = self.walk('group_posts', self.group.slug)
+        self.assertEqual(len(group_posts), 2)
+        self.assertEqual(
+            self.get('group_detail', self.group.slug).json()['title'],
+            'Группа',
+        )
+        self.assertEqual(
+            [group['slug'] for group in self.walk('group_list')],
+            ['api-group'],
+        )
+        self.assertEqual(len(self.walk('profile_posts', 'author')), 5)
+        profile = self.get('profile_detail', 'author').json()
+        self.assertEqual(profile['full_name'], 'Лев Толстой')
+        self.assertEqual(profile['posts_count'], 5)
+        self.assertEqual(profile['followers_count'], 1)
+
+    def test_profile_without_counters(self):
+        self.author.profile.delete()
+        profile = self.get('profile_detail', 'author').json()
+        self.assertEqual(profile['posts_count'], 5)
+        self.assertEqual(profile['followers_count'], 1)
+        self.assertEqual(profile['following_count'], 0)
+
+    def test_comments_in_creation_order(self):
+        results = self.walk('post_comments', self.posts[0].id, limit=2)
+        self.assertEqual(
+            [comment['text'] for comment in results],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+
+    def test_feed_requires_login(self):
+        self.assertEqual(self.get('feed').status_code, 401)
+        self.client.force_login(self.reader)
+        results = self.walk('feed', limit=3)
+        self.assertEqual(
+            [post['id'] for post in results],
+            [post.id for post in reversed(self.posts)],
+        )
+
+    def test_missing_objects_are_json_404(self):
+        responses = (
+            self.get('post_detail', 100500),
+            self.get('post_comments', 100500),
+            self.get('group_posts', 'nope'),
+            self.get('profile_detail', 'nobody'),
+        )
+        for response in responses:
+            with self.subTest(path=response.request['PATH_INFO']):
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Не найдено'})
+
+    def test_only_get_is_allowed(self):
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for _ in range(30):
+            post = Post.objects.create(
+                author=self.author, text='Ещё', group=self.group
+            )
+            Comment.objects.create(post=post, author=self.reader, text='!')
+        self.client.force_login(self.reader)
+        # Сессия и пользователь читаются только для ленты
+        budgets = {
+            ('post_list',): 1,
+            ('post_detail', post.id): 1,
+            ('post_comments', post.id): 2,
+            ('group_list',): 1,
+            ('group_posts', self.group.slug): 2,
+            ('profile_detail', 'author'): 1,
+            ('profile_posts', 'author'): 2,
+            ('feed',): 3,
+        }
+        for (name, *args), budget in budgets.items():
+            for limit in (1, 50):
+                with self.subTest(name=name, limit=limit):
+                    with self.assertNumQueries(budget):
+                        self.get(name, *args, limit=limit)
@@ -0,0 +1,165 @@
+import functools
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+from yatube.settings import API_MAX_PAGE_SIZE, API_PAGE_SIZE
+
+from posts.models import Comment, FeedItem, Group, Post, User
+from posts.paginators import CursorPaginator
+from .serializers import (COMMENT_FIELDS, GROUP_FIELDS, POST_FIELDS,
+                          PROFILE_FIELDS, FieldError, parse_fields,
+                          serialize)
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def api_view(view):
+    """Только GET; ошибки отдаются в JSON, а не страницей сайта."""
+    @require_GET
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return JsonResponse(view(request, *args, **kwargs))
+        except Http404:
+            error = ApiError('Не найдено', status=404)
+        except FieldError as field_error:
+            error = ApiError(str(field_error))
+        except ApiError as api_error:
+            error = api_error
+        return JsonResponse({'detail': error.detail}, status=error.status)
+    return wrapper
+
+
+def _page_size(request):
+    raw = request.GET.get('limit')
+    if not raw:
+        return API_PAGE_SIZE
+    try:
+        size = int(raw)
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def _link(request, **cursor):
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params.update(cursor)
+    return f'{request.path}?{params.urlencode()}'
+
+
+def _page(request, queryset, spec, ordering=None, transform=None):
+    """Курсорная страница: один запрос независимо от её номера."""
+    fields = parse_fields(request.GET.get('fields'), spec)
+    paginator = CursorPaginator(queryset, _page_size(request), ordering)
+    page = paginator.get_page(
+        after=request.GET.get('after'), before=request.GET.get('before')
+    )
+    objects = page.object_list
+    if transform is not None:
+        objects = [transform(obj) for obj in objects]
+    next_cursor, previous_cursor = page.next_cursor, page.previous_cursor
+    return {
+        'results': [serialize(obj, fields, spec) for obj in objects],
+        'next': next_cursor and _link(request, after=next_cursor),
+        'previous': previous_cursor and _link(request,
+                                              before=previous_cursor),
+    }
+
+
+def _posts():
+    return Post.objects.select_related('author', 'group')
+
+
+def _ids(raw):
+    try:
+        ids = [int(pk) for pk in raw.split(',') if pk.strip()]
+    except ValueError:
+        raise ApiError('ids - список чисел через запятую')
+    if len(ids) > API_MAX_PAGE_SIZE:
+        raise ApiError(f'Не больше {API_MAX_PAGE_SIZE} ids за раз')
+    return ids
+
+
+@api_view
+def post_list(request):
+    raw_ids = request.GET.get('ids')
+    if raw_ids is None:
+        return _page(request, _posts(), POST_FIELDS)
+    # Пачка постов по id - один запрос, порядок как в запросе
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    ids = _ids(raw_ids)
+    posts = _posts().in_bulk(ids)
+    return {'results': [
+        serialize(posts[pk], fields, POST_FIELDS)
+        for pk in ids if pk in posts
+    ]}
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = parse_fields(request.GET.get('fields'), POST_FIELDS)
+    post = get_object_or_404(_posts(), pk=post_id)
+    return serialize(post, fields, POST_FIELDS)
+
+
+@api_view
+def post_comments(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    return _page(request, comments, COMMENT_FIELDS)
+
+
+@api_view
+def group_list(request):
+    return _page(request, Group.objects.all(), GROUP_FIELDS, ('slug',))
+
+
+@api_view
+def group_detail(request, slug):
+    fields = parse_fields(request.GET.get('fields'), GROUP_FIELDS)
+    group = get_object_or_404(Group, slug=slug)
+    return serialize(group, fields, GROUP_FIELDS)
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _page(request, _posts().filter(group=group), POST_FIELDS)
+
+
+@api_view
+def profile_detail(request, username):
+    fields = parse_fields(request.GET.get('fields'), PROFILE_FIELDS)
+    user = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    return serialize(user, fields, PROFILE_FIELDS)
+
+
+@api_view
+def profile_posts(request, username):
+    user = get_object_or_404(User, username=username)
+    return _page(request, _posts().filter(author=user), POST_FIELDS)
+
+
+@api_view
+def feed(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужна авторизация', status=401)
+    items = FeedItem.objects.filter(user=request.user).select_related(
+        'post__author', 'post__group'
+    )
+    return _page(request, items, POST_FIELDS,
+                 ordering=('-pub_date', '-post_id'),
+                 transform=lambda item: item.post)
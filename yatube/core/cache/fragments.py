@@ -0,0 +1,41 @@
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core import routers
+
+
+class PrimaryFragmentCache(BaseCache):
+    """Кэш фрагментов шаблонов поверх другого кэша (LOCATION - его имя).
+
+    Фрагмент, отрисованный в запросе, который читал с реплики, не
+    сохраняется: отстающая реплика иначе закрепила бы устаревшую копию
+    под ключом текущего поколения до следующей записи.
+    """
+
+    proxy = True
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._alias = location or 'default'
+
+    @property
+    def _cache(self):
+        return caches[self._alias]
+
+    def get(self, key, default=None, version=None):
+        return self._cache.get(key, default, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if not routers.replica_read():
+            self._cache.set(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        if routers.replica_read():
+            return False
+        return self._cache.add(key, value, timeout, version)
+
+    def delete(self, key, version=None):
+        self._cache.delete(key, version)
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,194 @@
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class _Connection:
+    """Соединение потока с файлом кэша и процесс, который его открыл."""
+
+    __slots__ = ('db', 'pid', '__weakref__')
+
+    def __init__(self, db):
+        self.db = db
+        self.pid = os.getpid()
+
+    def __del__(self):
+        # Само соединение освобождается только сборщиком циклов (его
+        # держит собственный кэш запросов) и могло бы дожить до fork
+        self.db.close()
+
+
+# Открытые соединения процесса; после fork они закрываются в дочернем
+_connections = weakref.WeakSet()
+
+
+def _close_inherited():
+    # Сразу после fork у дочернего процесса ещё нет своих блокировок
+    # файла, и закрыть соединения родителя безопасно. Позже закрытие
+    # сняло бы POSIX-блокировки, которые держат новые соединения.
+    for connection in list(_connections):
+        connection.db.close()
+    _connections.clear()
+
+
+os.register_at_fork(after_in_child=_close_inherited)
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в отдельном файле SQLite, общий для всех процессов на машине.
+
+    В отличие от LocMemCache, запись одного воркера сразу видна
+    остальным, а внешний сервис не нужен. Файл работает в режиме WAL,
+    поэтому чтения не блокируются записью.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        # Доля записей, перед которыми проверяется размер кэша: COUNT(*)
+        # на каждой записи обходится дороже самой записи.
+        options = params.get('OPTIONS', {})
+        self._cull_probability = float(
+            options.get('CULL_PROBABILITY', 0.01)
+        )
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or connection.pid != os.getpid():
+            db = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            connection = self._local.connection = _Connection(db)
+            _connections.add(connection)
+        return connection.db
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE сразу берёт блокировку записи: между чтением
+        # и записью другой процесс не вклинится.
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _expiry(self, timeout):
+        # Абсолютное время истечения или None для вечных записей
+        return self.get_backend_timeout(timeout)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _fetch(self, key):
+        row = self._db.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def _store(self, key, value, timeout, mode):
+        self._cull()
+        cursor = self._db.execute(
+            f'INSERT OR {mode} INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, self.pickle_protocol),
+             self._expiry(timeout)),
+        )
+        return cursor.rowcount > 0
+
+    def _cull(self):
+        if self._cull_frequency == 0 or (
+            random.random() >= self._cull_probability
+        ):
+            return
+        db = self._db
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count < self._max_entries:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count >= self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._transaction() as db:
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time()),
+            )
+            return self._store(key, value, timeout, 'IGNORE')
+
+    def get(self, key, default=None, version=None):
+        value = self._fetch(self._key(key, version))
+        return default if value is None else value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(self._key(key, version), value, timeout, 'REPLACE')
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), self._key(key, version), time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),)
+        )
+
+    def has_key(self, key, version=None):
+        return self._fetch(self._key(key, version)) is not None
+
+    def incr(self, key, delta=1, version=None):
+        # Чтение и запись в одной транзакции: параллельные incr
+        # из разных процессов не теряют приращений.
+        key = self._key(key, version)
+        with self._transaction() as db:
+            value = self._fetch(key)
+            if value is None:
+                raise ValueError("Key '%s' not found" % key)
+            value += delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, self.pickle_protocol), key),
+            )
+        return value
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение держится на поток и переживает запрос, как и у
+        # остальных бэкендов кэша.
+        pass
@@ -0,0 +1,361 @@
+import cProfile
+import functools
+import io
+import json
+import logging
+import mimetypes
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.http import FileResponse, HttpResponse
+from django.template.backends.django import Template
+
+from . import routers
+
+logger = logging.getLogger('core.timing')
+slow_logger = logging.getLogger('core.timing.slow')
+
+_local = threading.local()
+
+
+class Timing:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.slow_queries = []
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+            threshold = getattr(settings, 'REQUEST_TIMING_SLOW_QUERY_MS', 100)
+            if elapsed * 1000 >= threshold:
+                self.slow_queries.append((sql, elapsed))
+
+
+def _current():
+    return getattr(_local, 'timing', None)
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timing = _current()
+        if timing is None:
+            return render(self, *args, **kwargs)
+        # Вложенный render_to_string уже учтён во внешнем шаблоне
+        timing.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timing.template_depth -= 1
+            if not timing.template_depth:
+                timing.template_time += time.perf_counter() - started
+    wrapper.timed = True
+    return wrapper
+
+
+def _timed_get(get):
+    @functools.wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, default=default, version=version)
+        timing = _current()
+        if timing is not None:
+            if value is default:
+                timing.cache_misses += 1
+            else:
+                timing.cache_hits += 1
+        return value
+    wrapper.timed = True
+    return wrapper
+
+
+def _timed_get_many(get_many):
+    @functools.wraps(get_many)
+    def wrapper(self, keys, version=None):
+        values = get_many(self, keys, version=version)
+        timing = _current()
+        if timing is not None:
+            timing.cache_hits += len(values)
+            timing.cache_misses += len(keys) - len(values)
+        return values
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument():
+    """Оборачивает рендер шаблонов и чтение из настроенных кэшей.
+
+    Обёртки ничего не считают вне запроса и ставятся один раз.
+    """
+    if not getattr(Template.render, 'timed', False):
+        Template.render = _timed_render(Template.render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        # Прокси читает через другой настроенный кэш - не считаем дважды
+        if getattr(backend, 'proxy', False):
+            continue
+        if not getattr(backend.get, 'timed', False):
+            backend.get = _timed_get(backend.get)
+        # Базовый get_many сам вызывает get - не считаем дважды
+        overridden = backend.get_many is not BaseCache.get_many
+        if overridden and not getattr(backend.get_many, 'timed', False):
+            backend.get_many = _timed_get_many(backend.get_many)
+
+
+class RequestTimingMiddleware:
+    """Замеряет запрос: SQL, шаблоны, кэш и общее время.
+
+    Итог отдаётся в заголовке Server-Timing; доля запросов
+    REQUEST_TIMING_SAMPLE_RATE пишется в лог core.timing строкой JSON,
+    запросы к базе дольше REQUEST_TIMING_SLOW_QUERY_MS - в
+    core.timing.slow вместе с текстом SQL и именем представления.
+    Подключается добавлением в MIDDLEWARE первым пунктом.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        timing = Timing()
+        _local.timing = timing
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.timing = None
+        total = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        timing.view = match.view_name if match else None
+        response['Server-Timing'] = self.server_timing(timing, total)
+        self.log(request, response, timing, total)
+        return response
+
+    @staticmethod
+    def server_timing(timing, total):
+        return ', '.join((
+            f'db;desc="{timing.queries} queries";'
+            f'dur={timing.db_time * 1000:.1f}',
+            f'tpl;dur={timing.template_time * 1000:.1f}',
+            f'cache;desc="{timing.cache_hits} hit '
+            f'{timing.cache_misses} miss"',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+    @staticmethod
+    def log(request, response, timing, total):
+        for sql, elapsed in timing.slow_queries:
+            slow_logger.warning(
+                'Медленный запрос %.1f мс в %s: %s',
+                elapsed * 1000, timing.view, sql,
+            )
+        rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0.01)
+        if random.random() >= rate:
+            return
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': timing.view,
+            'status': response.status_code,
+            'queries': timing.queries,
+            'db_ms': round(timing.db_time * 1000, 2),
+            'template_ms': round(timing.template_time * 1000, 2),
+            'cache_hits': timing.cache_hits,
+            'cache_misses': timing.cache_misses,
+            'slow_queries': len(timing.slow_queries),
+            'total_ms': round(total * 1000, 2),
+        }, ensure_ascii=False))
+
+
+class ProfilerMiddleware:
+    """Профилирует запрос сотрудника через cProfile по требованию.
+
+    Срабатывает, только если PROFILER_ENABLED, пользователь - staff и
+    в запросе есть параметр ?_profile (в ответ придёт текстовая сводка
+    вместо страницы) или заголовок X-Profile (страница придёт как
+    обычно, имя файла статистики - в заголовке X-Profile-Stats).
+    Файлы .prof сохраняются в PROFILER_DIR. Ставится после
+    AuthenticationMiddleware.
+    """
+
+    param = '_profile'
+    header = 'HTTP_X_PROFILE'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.triggered(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.get_response, request)
+        name = self.save(request, profiler)
+        if self.param in request.GET:
+            return HttpResponse(
+                f'{name}\n\n{self.summary(profiler)}',
+                content_type='text/plain; charset=utf-8',
+            )
+        response['X-Profile-Stats'] = name
+        return response
+
+    def triggered(self, request):
+        if self.param not in request.GET and self.header not in request.META:
+            return False
+        return (
+            getattr(settings, 'PROFILER_ENABLED', False)
+            and request.user.is_staff
+        )
+
+    @staticmethod
+    def save(request, profiler):
+        directory = settings.PROFILER_DIR
+        os.makedirs(directory, exist_ok=True)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name.replace(':', '-') if match else 'unresolved'
+        name = f'{int(time.time() * 1000)}-{view}-{request.user.pk}.prof'
+        profiler.dump_stats(os.path.join(directory, name))
+        return name
+
+    @staticmethod
+    def summary(profiler):
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(
+            getattr(settings, 'PROFILER_TOP', 30)
+        )
+        return stream.getvalue()
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT без отдельного сервера.
+
+    Файлы с хешем в имени кэшируются браузером навсегда (immutable),
+    остальные - на STATIC_MAX_AGE. Если клиент принимает br или gzip и
+    рядом лежит сжатая копия, отдаётся она. Ставится сразу после
+    SecurityMiddleware.
+    """
+
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        prefix = settings.STATIC_URL
+        if (request.method not in ('GET', 'HEAD')
+                or not request.path.startswith(prefix)):
+            return self.get_response(request)
+        name = request.path[len(prefix):]
+        storage = staticfiles_storage
+        path = self.local_path(storage, name)
+        if path is None:
+            return self.get_response(request)
+        return self.serve(request, storage, name, path)
+
+    @staticmethod
+    def local_path(storage, name):
+        local_path = getattr(storage, 'local_path', None)
+        if local_path is None or '..' in name.split('/'):
+            return None
+        return local_path(name)
+
+    def serve(self, request, storage, name, path):
+        content_type, _ = mimetypes.guess_type(name)
+        encoding = None
+        accepted = self.accepted_encodings(request)
+        for candidate, suffix in self.encodings:
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        response['Vary'] = 'Accept-Encoding'
+        if storage.is_hashed(name):
+            response['Cache-Control'] = (
+                'public, max-age=31536000, immutable'
+            )
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        return response
+
+    @staticmethod
+    def accepted_encodings(request):
+        accepted = set()
+        header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        for part in header.split(','):
+            token, _, params = part.strip().partition(';')
+            if params.strip().replace(' ', '') in ('q=0', 'q=0.0'):
+                continue
+            accepted.add(token.strip().lower())
+        return accepted
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет чтения GET-запросов к выбранным приложениям на реплики.
+
+    Ответ, собранный по данным реплики, уходит без ETag: иначе браузер
+    подтверждал бы устаревшую копию ответом 304.
+
+    После записи пользователь получает cookie и на REPLICA_STICKY_SECONDS
+    закрепляется за основной базой, чтобы сразу видеть свои изменения,
+    даже если реплика отстаёт. Ставится после AuthenticationMiddleware.
+    """
+
+    cookie = 'pin_primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.begin(pinned=self.cookie in request.COOKIES)
+        try:
+            response = self.get_response(request)
+            if routers.replica_read() and response.status_code == 200:
+                del response['ETag']
+        finally:
+            wrote = routers.end()
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.cookie, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if (request.method in ('GET', 'HEAD') and match
+                and match.app_name in settings.REPLICA_APPS):
+            routers.use_replicas()
@@ -0,0 +1,69 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_local = threading.local()
+
+
+def begin(pinned=False):
+    """Начинает запрос: по умолчанию всё читается с основной базы."""
+    _local.replicas = False
+    _local.pinned = pinned
+    _local.wrote = False
+    _local.replica_read = False
+
+
+def use_replicas():
+    """Разрешает читать с реплик до конца запроса."""
+    _local.replicas = True
+
+
+def end():
+    """Завершает запрос; возвращает True, если в нём была запись."""
+    wrote = getattr(_local, 'wrote', False)
+    begin()
+    return wrote
+
+
+def replica_read():
+    """Читал ли текущий запрос что-нибудь с реплики.
+
+    Такой результат может отставать, поэтому его не кладут в общий
+    кэш и не отдают с ETag.
+    """
+    return getattr(_local, 'replica_read', False)
+
+
+def _replicas_allowed():
+    if not getattr(_local, 'replicas', False):
+        return False
+    if _local.pinned or _local.wrote:
+        return False
+    # Внутри транзакции читаем то, что в ней же и записано
+    return not connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReplicaRouter:
+    """Чтения - с реплики из DATABASE_REPLICAS, запись - в основную базу.
+
+    Реплики используются, только если их разрешило
+    ReplicaRoutingMiddleware, пользователь не закреплён за основной
+    базой и в текущем запросе ещё ничего не записано.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and _replicas_allowed():
+            _local.replica_read = True
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики - копии основной базы, объекты из них можно связывать
+        return True
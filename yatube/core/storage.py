@@ -0,0 +1,70 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.utils.functional import cached_property
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml',
+                '.map', '.ico')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем в имени и готовыми сжатыми копиями рядом.
+
+    collectstatic кладёт к каждому текстовому файлу .gz, а если
+    установлен пакет brotli - ещё и .br. Пока collectstatic не запускали
+    (разработка, тесты), {% static %} отдаёт обычные имена.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файла нет в STATIC_ROOT - хеш посчитать не из чего
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        self.__dict__.pop('hashed_names', None)
+        for name in self.hashed_files.values():
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as file:
+            data = file.read()
+        variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data)))
+        for suffix, compressed in variants:
+            # Сжатие не окупилось - браузер получит исходник
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+    @cached_property
+    def hashed_names(self):
+        return set(self.hashed_files.values())
+
+    def is_hashed(self, name):
+        return name in self.hashed_names
+
+    def local_path(self, name):
+        """Путь к файлу в STATIC_ROOT или None, если его там нет."""
+        try:
+            path = self.path(name)
+        except Exception:
+            return None
+        return path if os.path.isfile(path) else None
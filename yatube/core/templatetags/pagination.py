@@ -0,0 +1,32 @@
+from django import template
+from yatube.settings import PAGINATOR_ON_EACH_SIDE, PAGINATOR_ON_ENDS
+
+register = template.Library()
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=PAGINATOR_ON_EACH_SIDE,
+                on_ends=PAGINATOR_ON_ENDS):
+    """Номера страниц вокруг текущей и у краёв; None - пропуск «…».
+
+    Ссылок всегда не больше 2 * (on_each_side + on_ends) + 3,
+    сколько бы страниц ни было в списке.
+    """
+    number = page_obj.number
+    num_pages = page_obj.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > on_each_side + on_ends + 2:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(None)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages.extend(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(None)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import SimpleTestCase
+
+from core.cache.sqlite import SQLiteCache
+
+context = multiprocessing.get_context('fork')
+
+
+def _set(backend, location, key, value):
+    backend(location, {}).set(key, value)
+
+
+def _get(backend, location, key, queue):
+    queue.put(backend(location, {}).get(key))
+
+
+def _incr(backend, location, key, times):
+    cache = backend(location, {})
+    for _ in range(times):
+        cache.incr(key)
+
+
+def _incr_inherited(cache, key, queue):
+    # Соединение родителя должно быть закрыто до первой записи потомка
+    try:
+        cache._local.connection.db.execute('SELECT 1')
+    except sqlite3.ProgrammingError:
+        queue.put('closed')
+    else:
+        queue.put('open')
+    cache.incr(key)
+
+
+def _run(target, *args):
+    process = context.Process(target=target, args=args)
+    process.start()
+    process.join(30)
+    return process.exitcode
+
+
+class SharedCacheTest(SimpleTestCase):
+    """Запись в одном процессе видна в другом."""
+
+    backends = {
+        FileBasedCache: 'cache',
+        SQLiteCache: 'cache.sqlite3',
+    }
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def location(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_write_is_visible_in_another_process(self):
+        for backend, name in self.backends.items():
+            with self.subTest(backend=backend.__name__):
+                location = self.location(name)
+                self.assertEqual(
+                    _run(_set, backend, location, 'key', 'значение'), 0
+                )
+                queue = context.Queue()
+                self.assertEqual(
+                    _run(_get, backend, location, 'key', queue), 0
+                )
+                self.assertEqual(queue.get(timeout=5), 'значение')
+
+    def test_concurrent_incr_is_atomic(self):
+        location = self.location('cache.sqlite3')
+        SQLiteCache(location, {}).set('counter', 0)
+        processes = [
+            context.Process(
+                target=_incr, args=(SQLiteCache, location, 'counter', 50)
+            )
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+        self.assertEqual(SQLiteCache(location, {}).get('counter'), 200)
+
+    def test_connection_open_at_fork_is_closed_in_child(self):
+        cache = SQLiteCache(self.location('cache.sqlite3'), {})
+        cache.set('counter', 0)
+        queue = context.Queue()
+        self.assertEqual(
+            _run(_incr_inherited, cache, 'counter', queue), 0
+        )
+        self.assertEqual(queue.get(timeout=5), 'closed')
+        self.assertEqual(cache.incr('counter'), 2)
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = SQLiteCache(
+            os.path.join(directory.name, 'cache.sqlite3'),
+            {'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_PROBABILITY': 1}},
+        )
+
+    def test_add_does_not_overwrite(self):
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 1)
+
+    def test_expired_entries_are_missing(self):
+        self.cache.set('key', 1, timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 2))
+
+    def test_incr_missing_key_raises(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_failed_add_rolls_back(self):
+        self.cache.set('key', 1, timeout=-1)
+        with self.assertRaises(Exception):
+            self.cache.add('key', lambda: None)
+        # Удаление просроченной записи откатилось вместе с добавлением
+        count = self.cache._db.execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()[0]
+        self.assertEqual(count, 1)
+        self.assertTrue(self.cache.add('key', 2))
+
+    def test_delete_and_clear(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.delete('a')
+        self.assertFalse(self.cache.has_key('a'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('b'))
+
+    def test_cull_keeps_size_bounded(self):
+        for i in range(30):
+            self.cache.set(f'key{i}', i)
+        count = self.cache._db.execute(
+            'SELECT COUNT(*) FROM cache'
+        ).fetchone()[0]
+        self.assertLessEqual(count, 10)
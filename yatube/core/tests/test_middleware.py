@@ -0,0 +1,72 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from yatube import settings
+
+from posts.models import Post, User
+
+TIMED_MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware', *settings.MIDDLEWARE
+]
+
+
+@override_settings(MIDDLEWARE=TIMED_MIDDLEWARE,
+                   REQUEST_TIMING_SAMPLE_RATE=0,
+                   REQUEST_TIMING_SLOW_QUERY_MS=10000)
+class RequestTimingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='timed')
+        Post.objects.create(author=cls.user, text='Замеряемый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def metrics(response):
+        metrics = {}
+        for part in response['Server-Timing'].split(', '):
+            name, *params = part.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+        return metrics
+
+    def test_server_timing_header(self):
+        metrics = self.metrics(self.client.get(reverse('posts:index')))
+        self.assertEqual(set(metrics), {'db', 'tpl', 'cache', 'total'})
+        self.assertNotEqual(metrics['db']['desc'], '"0 queries"')
+        self.assertGreater(float(metrics['tpl']['dur']), 0)
+        self.assertGreaterEqual(
+            float(metrics['total']['dur']), float(metrics['db']['dur'])
+        )
+
+    def test_cache_hits_and_misses(self):
+        first = self.metrics(self.client.get(reverse('posts:index')))
+        second = self.metrics(self.client.get(reverse('posts:index')))
+        self.assertNotIn('0 miss', first['cache']['desc'])
+        self.assertIn(' 0 miss', second['cache']['desc'])
+        self.assertEqual(second['db']['desc'], '"0 queries"')
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    def test_sampled_log_line(self):
+        with self.assertLogs('core.timing', 'INFO') as logs:
+            self.client.get(reverse('posts:index'))
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(REQUEST_TIMING_SLOW_QUERY_MS=0)
+    def test_slow_queries_are_logged_with_sql_and_view(self):
+        with self.assertLogs('core.timing.slow', 'WARNING') as logs:
+            self.client.get(
+                reverse('posts:profile', args=[self.user.username])
+            )
+        self.assertIn('posts:profile', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_nothing_is_counted_outside_requests(self):
+        cache.get('outside')
+        response = self.client.get(reverse('about:author'))
+        self.assertIn('0 hit 0 miss', response['Server-Timing'])
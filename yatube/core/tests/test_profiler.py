@@ -0,0 +1,66 @@
+import os
+import pstats
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from yatube import settings
+
+from posts.models import User
+
+PROFILER_DIR = tempfile.mkdtemp()
+PROFILED_MIDDLEWARE = [
+    *settings.MIDDLEWARE, 'core.middleware.ProfilerMiddleware'
+]
+
+
+@override_settings(MIDDLEWARE=PROFILED_MIDDLEWARE, PROFILER_ENABLED=True,
+                   PROFILER_DIR=PROFILER_DIR, PROFILER_TOP=5)
+class ProfilerMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='regular')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILER_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.url = reverse('posts:index')
+
+    def test_param_returns_summary_and_saves_stats(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'_profile': ''})
+        self.assertEqual(response['Content-Type'],
+                         'text/plain; charset=utf-8')
+        text = response.content.decode()
+        name = text.splitlines()[0]
+        self.assertIn('posts-index', name)
+        self.assertIn('cumulative', text)
+        stats = pstats.Stats(os.path.join(PROFILER_DIR, name))
+        self.assertTrue(stats.total_calls)
+
+    def test_header_keeps_page_and_names_stats_file(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertContains(response, 'Последние обновления')
+        self.assertTrue(os.path.exists(
+            os.path.join(PROFILER_DIR, response['X-Profile-Stats'])
+        ))
+
+    def test_not_triggered_for_regular_users_and_guests(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {'_profile': ''})
+        self.assertContains(response, 'Последние обновления')
+        self.client.logout()
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Stats', response)
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_disabled_by_setting(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Stats', response)
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+REPLICA = 'replica'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTest(TransactionTestCase):
+    """Основная база и реплика - два отдельных файла SQLite.
+
+    Репликации между ними нет: реплика всё время отстаёт, и по запросам
+    к ней и по содержимому страниц видно, откуда читало представление.
+    """
+
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory, 'replica.sqlite3'),
+        }
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections.databases[REPLICA]
+        delattr(connections._connections, REPLICA)
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='replica-group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.author, text='Пост', group=self.group
+        )
+        # Сам пост до реплики уже дошёл, без сигналов
+        User.objects.using(REPLICA).bulk_create([self.author])
+        Group.objects.using(REPLICA).bulk_create([self.group])
+        Post.objects.using(REPLICA).bulk_create([self.post])
+        self.comments_url = reverse('posts:post_comments',
+                                    args=[self.post.id])
+
+    def replica_queries(self, url):
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            response = self.client.get(url)
+        return response, len(queries)
+
+    def test_plain_views_read_from_replica(self):
+        _, queries = self.replica_queries(self.comments_url)
+        self.assertGreater(queries, 0)
+
+    def test_other_apps_read_from_primary(self):
+        response, queries = self.replica_queries(
+            reverse('api:group_detail', args=[self.group.slug])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 0)
+
+    def test_lagging_replica_does_not_fill_cache_or_etag(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.id]),
+        )
+        Post.objects.create(author=self.author, text='Свежий',
+                            group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response, queries = self.replica_queries(url)
+                self.assertGreater(queries, 0)
+                self.assertNotIn('ETag', response)
+        # Реплика о новом посте не знает, но её страницы не попали
+        # в кэш: основная база сразу показывает свежий пост
+        self.client.cookies['pin_primary'] = '1'
+        for url in urls[:3]:
+            with self.subTest(url=url):
+                response, queries = self.replica_queries(url)
+                self.assertEqual(queries, 0)
+                self.assertContains(response, 'Свежий')
+                self.assertIn('ETag', response)
+
+    def test_writer_sticks_to_primary(self):
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.id]),
+            data={'text': 'Новый комментарий'},
+        )
+        self.assertIn('pin_primary', response.cookies)
+        self.assertFalse(Comment.objects.using(REPLICA).exists())
+        response, queries = self.replica_queries(self.comments_url)
+        self.assertEqual(queries, 0)
+        self.assertContains(response, 'Новый комментарий')
+        # Без cookie отстающая реплика ещё не знает о комментарии
+        del self.client.cookies['pin_primary']
+        response, queries = self.replica_queries(self.comments_url)
+        self.assertGreater(queries, 0)
+        self.assertNotContains(response, 'Новый комментарий')
+
+    def test_reads_do_not_pin(self):
+        response, _ = self.replica_queries(self.comments_url)
+        self.assertNotIn('pin_primary', response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_primary(self):
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.id]),
+            data={'text': 'Новый комментарий'},
+        )
+        self.assertNotIn('pin_primary', response.cookies)
+        response, queries = self.replica_queries(self.comments_url)
+        self.assertEqual(queries, 0)
+        self.assertContains(response, 'Новый комментарий')
@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase, override_settings
+
+ALIAS = 'pragmas'
+BASELINE = {'journal_mode': 'DELETE', 'busy_timeout': 0}
+
+
+class SQLitePragmasTest(SimpleTestCase):
+    """Отдельный файл базы: в памяти WAL и блокировки файла не работают."""
+
+    databases = {ALIAS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        connections.databases[ALIAS] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.directory, 'pragmas.sqlite3'),
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[ALIAS].close()
+        del connections.databases[ALIAS]
+        delattr(connections._connections, ALIAS)
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        # Новое соединение на каждый тест, чтобы сработали PRAGMA
+        connections[ALIAS].close()
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        self.addCleanup(connections[ALIAS].close)
+
+    def new_connection(self):
+        """Второе соединение с той же базой в этом же потоке."""
+        wrapper = connections[ALIAS].__class__(
+            connections.databases[ALIAS], ALIAS
+        )
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def create_table(self):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE item (id INTEGER PRIMARY KEY, value TEXT)'
+            )
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        expected = {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': 5000,
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -20000,
+            'temp_store': 2,
+        }
+        with connections[ALIAS].cursor() as cursor:
+            for name, value in expected.items():
+                with self.subTest(pragma=name):
+                    cursor.execute(f'PRAGMA {name}')
+                    self.assertEqual(cursor.fetchone()[0], value)
+
+    def read_during_exclusive_write(self):
+        self.create_table()
+        writer = self.new_connection()
+        writer.ensure_connection()
+        writer.connection.execute('BEGIN EXCLUSIVE')
+        writer.connection.execute("INSERT INTO item (value) VALUES ('x')")
+        try:
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM item')
+                return cursor.fetchone()[0]
+        finally:
+            writer.connection.execute('ROLLBACK')
+
+    def test_readers_are_not_blocked_by_writer(self):
+        self.assertEqual(self.read_during_exclusive_write(), 0)
+
+    @override_settings(SQLITE_PRAGMAS=BASELINE)
+    def test_baseline_readers_are_blocked_by_writer(self):
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            self.read_during_exclusive_write()
+
+    def write(self, inserts, errors):
+        try:
+            for number in range(inserts):
+                with transaction.atomic(using=ALIAS):
+                    with connections[ALIAS].cursor() as cursor:
+                        cursor.execute(
+                            'INSERT INTO item (value) VALUES (%s)',
+                            [str(number)],
+                        )
+        except OperationalError as error:
+            errors.append(error)
+        finally:
+            connections[ALIAS].close()
+
+    def read(self, done, errors):
+        try:
+            while not done.is_set():
+                with connections[ALIAS].cursor() as cursor:
+                    cursor.execute('SELECT count(*) FROM item')
+        except OperationalError as error:
+            errors.append(error)
+        finally:
+            connections[ALIAS].close()
+
+    def test_concurrent_writes_and_reads_without_lock_errors(self):
+        self.create_table()
+        writers, readers, inserts = 4, 4, 50
+        errors = []
+        done = threading.Event()
+        reading = [
+            threading.Thread(target=self.read, args=(done, errors))
+            for _ in range(readers)
+        ]
+        writing = [
+            threading.Thread(target=self.write, args=(inserts, errors))
+            for _ in range(writers)
+        ]
+        for thread in reading + writing:
+            thread.start()
+        for thread in writing:
+            thread.join()
+        done.set()
+        for thread in reading:
+            thread.join()
+        self.assertEqual(errors, [])
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], writers * inserts)
@@ -0,0 +1,85 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+CSS = b'body { color: red; }\n' * 200
+
+
+class StaticPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'wb') as file:
+            file.write(CSS)
+        cls.settings_override = override_settings(
+            STATICFILES_DIRS=[cls.source], STATIC_ROOT=cls.root,
+        )
+        cls.settings_override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.hashed = staticfiles_storage.stored_name('css/site.css')
+
+    def test_static_tag_uses_hashed_name(self):
+        url = Template(
+            "{% load static %}{% static 'css/site.css' %}"
+        ).render(Context())
+        self.assertRegex(url, r'^/static/css/site\.[0-9a-f]{12}\.css$')
+        self.assertTrue(os.path.exists(
+            os.path.join(self.root, self.hashed + '.gz')
+        ))
+
+    def test_hashed_file_is_immutable_and_gzipped(self):
+        response = self.client.get(f'/static/{self.hashed}',
+                                   HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_plain_body_without_accept_encoding(self):
+        for header in ('', 'gzip;q=0'):
+            with self.subTest(header=header):
+                response = self.client.get(f'/static/{self.hashed}',
+                                           HTTP_ACCEPT_ENCODING=header)
+                self.assertNotIn('Content-Encoding', response)
+                self.assertEqual(b''.join(response.streaming_content), CSS)
+
+    def test_unhashed_name_gets_short_cache(self):
+        response = self.client.get('/static/css/site.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_missing_and_outside_files_are_not_served(self):
+        for path in ('/static/css/nope.css', '/static/../manage.py',
+                     '/static/css/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.client.get(path).status_code, 404)
+
+
+class StaticFallbackTest(TestCase):
+    @override_settings(STATIC_ROOT=tempfile.gettempdir() + '/no-static')
+    def test_without_collectstatic_plain_names_are_used(self):
+        url = Template(
+            "{% load static %}{% static 'css/bootstrap.min.css' %}"
+        ).render(Context())
+        self.assertEqual(url, '/static/css/bootstrap.min.css')
@@ -0,0 +1,159 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.throttle import check, parse_rate
+from posts.models import Comment, Post, User
+
+
+class SlowCache:
+    def __getattr__(self, name):
+        method = getattr(cache, name)
+
+        def slow(*args, **kwargs):
+            time.sleep(0.001)
+            return method(*args, **kwargs)
+        return slow
+
+
+RATES = {
+    'comment': {'user': '2/m', 'ip': '3/m'},
+    'follow': {'user': '2/m'},
+}
+
+
+@override_settings(THROTTLE_RATES=RATES)
+class ThrottleTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.users = [
+            User.objects.create_user(username=f'user{i}') for i in range(2)
+        ]
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.now = 1000.0
+        patcher = mock.patch('core.throttle.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_login(self.users[0])
+
+    def comment(self):
+        return self.client.post(
+            reverse('posts:add_comment', args=[self.post.id]),
+            data={'text': 'Комментарий'},
+        )
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/hour'), (100, 3600))
+
+    def test_burst_is_limited_with_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(self.comment().status_code, 302)
+        response = self.comment()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertTemplateUsed(response, 'core/429.html')
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_tokens_refill_over_time(self):
+        for _ in range(2):
+            self.comment()
+        # Отказы не тратят токены: через 30 с ровно один запрос
+        self.assertEqual(self.comment().status_code, 429)
+        self.now += 30
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 429)
+
+    def test_users_have_own_buckets_but_share_ip(self):
+        for _ in range(2):
+            self.comment()
+        self.client.force_login(self.users[1])
+        self.assertEqual(self.comment().status_code, 302)
+        # Третий токен корзины IP уже потрачен
+        self.assertEqual(self.comment().status_code, 429)
+        with self.subTest('другой адрес'):
+            response = self.client.post(
+                reverse('posts:add_comment', args=[self.post.id]),
+                data={'text': 'Комментарий'}, REMOTE_ADDR='10.0.0.2',
+            )
+            self.assertEqual(response.status_code, 302)
+
+    def test_only_listed_methods_are_throttled(self):
+        for _ in range(5):
+            response = self.client.get(
+                reverse('posts:add_comment', args=[self.post.id])
+            )
+            self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.comment().status_code, 302)
+
+    def test_follow_toggling_is_throttled(self):
+        urls = [
+            reverse('posts:profile_follow', args=['author']),
+            reverse('posts:profile_unfollow', args=['author']),
+        ]
+        for url in urls:
+            self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(urls[0]).status_code, 429)
+
+    def test_unconfigured_scope_is_not_throttled(self):
+        with self.settings(THROTTLE_RATES={}):
+            for _ in range(5):
+                self.assertEqual(self.comment().status_code, 302)
+
+    def anonymous(self, **meta):
+        request = RequestFactory().post('/', **meta)
+        request.user = AnonymousUser()
+        return request
+
+    @override_settings(THROTTLE_TRUSTED_PROXIES=1)
+    def test_ip_is_taken_from_trusted_proxy(self):
+        # Все запросы приходят с адреса прокси, клиенты различаются
+        # по X-Forwarded-For
+        for _ in range(3):
+            self.assertFalse(check(
+                self.anonymous(HTTP_X_FORWARDED_FOR='10.0.0.1'), 'comment'
+            ))
+        # Адрес левее добавленного прокси подделан клиентом
+        self.assertTrue(check(
+            self.anonymous(HTTP_X_FORWARDED_FOR='10.0.0.9, 10.0.0.1'),
+            'comment',
+        ))
+        self.assertFalse(check(
+            self.anonymous(HTTP_X_FORWARDED_FOR='10.0.0.2'), 'comment'
+        ))
+
+    def test_forwarded_for_is_ignored_without_proxies(self):
+        for address in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            check(self.anonymous(HTTP_X_FORWARDED_FOR=address), 'comment')
+        self.assertTrue(check(
+            self.anonymous(HTTP_X_FORWARDED_FOR='10.0.0.4'), 'comment'
+        ))
+
+    def test_parallel_requests_do_not_overspend(self):
+        request = self.anonymous()
+        passed = []
+        barrier = threading.Barrier(8)
+
+        def spend():
+            barrier.wait()
+            for _ in range(5):
+                if not check(request, 'comment'):
+                    passed.append(1)
+
+        threads = [threading.Thread(target=spend) for _ in range(8)]
+        # Пауза перед каждым обращением к кэшу перемешивает потоки
+        with mock.patch('core.throttle.cache', SlowCache()):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(passed), 3)
@@ -0,0 +1,113 @@
+"""Ограничение частоты записи: корзины токенов в кэше по умолчанию.
+
+У каждой области (scope) из THROTTLE_RATES две корзины: на пользователя
+и на IP. Корзина вмещает N токенов и пополняется со скоростью N за
+период ('10/m' - десять запросов подряд, затем по одному каждые 6 с).
+Запрос пропускается, только если токен есть в обеих корзинах.
+
+Корзина хранится одним числом - моментом, когда она снова наполнится
+(GCRA), и меняется только через incr, поэтому параллельные запросы
+не тратят больше токенов, чем в ней есть. За обратными прокси адрес
+клиента берётся из X-Forwarded-For (THROTTLE_TRUSTED_PROXIES).
+"""
+import functools
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .views import too_many_requests
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): ёмкость корзины и период пополнения в секундах."""
+    count, _, period = rate.partition('/')
+    return int(count), PERIODS[period[0]]
+
+
+def client_address(request):
+    """Адрес клиента с учётом THROTTLE_TRUSTED_PROXIES прокси перед сайтом.
+
+    Каждый прокси дописывает в X-Forwarded-For адрес, с которого к нему
+    пришли, поэтому клиент - N-й адрес с конца; всё левее мог подделать
+    сам клиент.
+    """
+    proxies = settings.THROTTLE_TRUSTED_PROXIES
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if proxies and forwarded:
+        addresses = [part.strip() for part in forwarded.split(',')]
+        return addresses[-min(proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _buckets(request, scope):
+    rates = settings.THROTTLE_RATES.get(scope, {})
+    if request.user.is_authenticated and 'user' in rates:
+        yield f'throttle:{scope}:user:{request.user.pk}', rates['user']
+    if 'ip' in rates:
+        address = client_address(request)
+        yield f'throttle:{scope}:ip:{address}', rates['ip']
+
+
+def _advance(key, interval, now, period):
+    """Сдвигает момент наполнения корзины на один токен, в мс."""
+    cache.add(key, now, period)
+    try:
+        full = cache.incr(key, interval)
+        if full - interval < now:
+            # Корзина уже была полной: отсчёт идёт от текущего момента
+            full = cache.incr(key, now - (full - interval))
+    except ValueError:
+        # Ключ вытеснили между add и incr
+        full = now + interval
+        cache.set(key, full, period)
+    return full
+
+
+def check(request, scope):
+    """Забирает токен; возвращает 0 или сколько секунд подождать."""
+    buckets = dict(_buckets(request, scope))
+    if not buckets:
+        return 0
+    now = int(time.time() * 1000)
+    spent = {}
+    wait = 0
+    for key, rate in buckets.items():
+        capacity, period = parse_rate(rate)
+        interval = period * 1000 // capacity
+        full = _advance(key, interval, now, period)
+        spent[key] = (interval, full)
+        # Больше периода вперёд - значит, токенов не осталось
+        wait = max(wait, full - now - period * 1000)
+    if wait > 0:
+        # Отказ не тратит токены, иначе пустая корзина не наполнится
+        for key, (interval, _) in spent.items():
+            try:
+                cache.decr(key, interval)
+            except ValueError:
+                pass
+        return wait / 1000
+    # Ключ живёт, пока корзина не наполнится: дальше он не нужен
+    for key, (_, full) in spent.items():
+        cache.touch(key, math.ceil((full - now) / 1000))
+    return 0
+
+
+def throttle(scope, methods=None):
+    """Отвечает 429 с Retry-After, если корзины scope пусты.
+
+    methods - какие методы запроса ограничивать; None - все.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                wait = check(request, scope)
+                if wait:
+                    return too_many_requests(request, math.ceil(wait))
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
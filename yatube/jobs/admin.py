@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'key', 'status', 'attempts', 'run_at')
+    search_fields = ('name', 'key')
+    list_filter = ('status', 'name')
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле потоков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int,
+                            default=settings.JOBS_WORKERS,
+                            help='потоков; 0 - выполнять в этом потоке')
+        parser.add_argument('--poll', type=float,
+                            default=settings.JOBS_POLL_INTERVAL,
+                            help='пауза между опросами пустой очереди, с')
+        parser.add_argument('--once', action='store_true',
+                            help='выйти, когда готовые задачи кончатся')
+
+    def handle(self, *args, **options):
+        try:
+            done, failed = queue.work(
+                options['workers'], once=options['once'],
+                poll=options['poll'],
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
@@ -0,0 +1,52 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача: имя зарегистрированной функции и её аргументы."""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'не удалась'),
+    )
+
+    name = models.CharField('задача', max_length=100)
+    args = models.TextField('аргументы (JSON)', default='[]')
+    key = models.CharField(
+        'ключ идемпотентности', max_length=255, null=True, blank=True
+    )
+    status = models.CharField(
+        'состояние', max_length=10, choices=STATUSES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('попыток', default=0)
+    max_attempts = models.PositiveIntegerField('предел попыток', default=5)
+    run_at = models.DateTimeField('не раньше', default=timezone.now)
+    locked_at = models.DateTimeField('взята в работу', null=True, blank=True)
+    last_error = models.TextField('последняя ошибка', blank=True)
+    created = models.DateTimeField('создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ('run_at', 'id')
+        verbose_name = 'задача'
+        verbose_name_plural = 'задачи'
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='jobs_job_status_run_at_idx'),
+        ]
+        # Одна задача с ключом в очереди; пока она выполняется,
+        # можно поставить следующую с тем же ключом.
+        constraints = [
+            models.UniqueConstraint(fields=['key'],
+                                    condition=Q(status='queued'),
+                                    name='jobs_job_unique_queued_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
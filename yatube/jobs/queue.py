@@ -0,0 +1,152 @@
+import json
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def task(name):
+    """Регистрирует функцию как задачу с именем name."""
+    def decorator(func):
+        _tasks[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, *args, key=None, delay=0):
+    """Ставит задачу в очередь; при JOBS_EAGER выполняет её сразу.
+
+    Аргументы должны сериализоваться в JSON. Пока в очереди есть задача
+    с тем же key, новая не ставится.
+    """
+    if settings.JOBS_EAGER:
+        _tasks[name](*args)
+        return
+    # INSERT OR IGNORE: повтор по ключу - один запрос без исключения
+    Job.objects.bulk_create([Job(
+        name=name, args=json.dumps(args), key=key,
+        max_attempts=settings.JOBS_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )], ignore_conflicts=True)
+
+
+def backoff(attempts):
+    """Пауза перед следующей попыткой: растёт вдвое с каждой неудачей."""
+    return min(settings.JOBS_BACKOFF * 2 ** (attempts - 1),
+               settings.JOBS_BACKOFF_MAX)
+
+
+def recover():
+    """Возвращает в очередь задачи, брошенные упавшим воркером."""
+    stale = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=stale
+    ).update(status=Job.QUEUED, locked_at=None)
+
+
+def claim(limit):
+    """Забирает до limit готовых задач, которые не взял другой воркер."""
+    now = timezone.now()
+    candidates = list(Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).values_list('pk', flat=True)[:limit])
+    claimed = [
+        pk for pk in candidates
+        # SQLite не умеет SELECT ... FOR UPDATE SKIP LOCKED, поэтому
+        # задачу забирает тот, чей UPDATE изменил строку.
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+        )
+    ]
+    return list(Job.objects.filter(pk__in=claimed))
+
+
+def run(job):
+    """Выполняет взятую задачу и записывает результат."""
+    try:
+        if job.name not in _tasks:
+            raise LookupError(f'Неизвестная задача: {job.name}')
+        _tasks[job.name](*json.loads(job.args))
+    except Exception:
+        logger.exception('Задача %s не выполнена', job)
+        _fail(job, traceback.format_exc())
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE, locked_at=None, last_error=''
+    )
+    return True
+
+
+def _fail(job, error):
+    if job.attempts >= job.max_attempts:
+        changes = {'status': Job.FAILED}
+    else:
+        changes = {
+            'status': Job.QUEUED,
+            'run_at': timezone.now() + timedelta(
+                seconds=backoff(job.attempts)
+            ),
+        }
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(
+                locked_at=None, last_error=error, **changes
+            )
+    except IntegrityError:
+        # Пока задача выполнялась, в очередь встала такая же - она и
+        # повторит работу
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.DONE, locked_at=None, last_error=error
+        )
+
+
+def _run_in_thread(job):
+    close_old_connections()
+    try:
+        return run(job)
+    finally:
+        close_old_connections()
+
+
+def work(workers=None, once=False, poll=None, stop=None):
+    """Цикл воркера; возвращает (выполнено, не удалось).
+
+    workers=0 - задачи выполняются в текущем потоке. once - выйти, когда
+    готовых задач не останется. stop - threading.Event для остановки.
+    """
+    workers = settings.JOBS_WORKERS if workers is None else workers
+    poll = settings.JOBS_POLL_INTERVAL if poll is None else poll
+    stop = stop or threading.Event()
+    done = failed = 0
+    pool = ThreadPoolExecutor(workers, 'jobs') if workers else None
+    try:
+        while not stop.is_set():
+            recover()
+            jobs = claim(workers or 1)
+            if not jobs:
+                if once:
+                    break
+                stop.wait(poll)
+                continue
+            if pool is None:
+                results = [run(job) for job in jobs]
+            else:
+                results = list(pool.map(_run_in_thread, jobs))
+            done += results.count(True)
+            failed += results.count(False)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return done, failed
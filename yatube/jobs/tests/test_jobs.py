@@ -0,0 +1,132 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs import queue
+from jobs.models import Job
+from posts.models import Comment, FeedItem, Follow, Post, User
+
+calls = []
+
+
+@queue.task('tests.record')
+def record(*args):
+    calls.append(args)
+
+
+@queue.task('tests.explode')
+def explode():
+    raise RuntimeError('сломалось')
+
+
+@override_settings(JOBS_EAGER=False, JOBS_MAX_ATTEMPTS=3, JOBS_BACKOFF=10)
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_eager_mode_runs_at_once(self):
+        with self.settings(JOBS_EAGER=True):
+            queue.enqueue('tests.record', 1, 'a')
+        self.assertEqual(calls, [(1, 'a')])
+        self.assertFalse(Job.objects.exists())
+
+    def test_worker_runs_queued_jobs(self):
+        queue.enqueue('tests.record', 1, 'a')
+        queue.enqueue('tests.record', 2, 'b')
+        self.assertEqual(calls, [])
+        self.assertEqual(queue.work(workers=0, once=True), (2, 0))
+        self.assertEqual(calls, [(1, 'a'), (2, 'b')])
+        self.assertEqual(
+            set(Job.objects.values_list('status', flat=True)), {Job.DONE}
+        )
+
+    def test_same_key_is_queued_once(self):
+        for _ in range(3):
+            queue.enqueue('tests.record', 1, key='same')
+        self.assertEqual(Job.objects.count(), 1)
+        queue.work(workers=0, once=True)
+        # Выполненная задача не мешает поставить такую же снова
+        queue.enqueue('tests.record', 1, key='same')
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+
+    def test_delayed_job_waits(self):
+        queue.enqueue('tests.record', 1, delay=60)
+        self.assertEqual(queue.work(workers=0, once=True), (0, 0))
+        self.assertEqual(calls, [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        queue.enqueue('tests.explode')
+        self.assertEqual(queue.work(workers=0, once=True), (0, 1))
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('сломалось', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=9))
+        self.assertEqual(queue.backoff(2), 20)
+        for _ in range(2):
+            Job.objects.update(run_at=timezone.now())
+            queue.work(workers=0, once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 3)
+
+    def test_unknown_task_fails(self):
+        Job.objects.create(name='tests.nope', max_attempts=1)
+        self.assertEqual(queue.work(workers=0, once=True), (0, 1))
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    @override_settings(JOBS_LOCK_TIMEOUT=60)
+    def test_abandoned_job_is_recovered(self):
+        Job.objects.create(
+            name='tests.record', args='[7]', status=Job.RUNNING,
+            locked_at=timezone.now() - timedelta(minutes=5),
+        )
+        Job.objects.create(
+            name='tests.record', args='[8]', status=Job.RUNNING,
+            locked_at=timezone.now(),
+        )
+        queue.work(workers=0, once=True)
+        self.assertEqual(calls, [(7,)])
+
+    def test_command(self):
+        queue.enqueue('tests.record', 1)
+        out = StringIO()
+        call_command('run_jobs', workers=0, once=True, stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+
+
+@override_settings(JOBS_EAGER=False)
+class PostJobsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_post_save_enqueues_side_effects(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertEqual(
+            set(Job.objects.values_list('name', flat=True)),
+            {'posts.fan_out', 'posts.index'},
+        )
+        self.assertFalse(FeedItem.objects.exists())
+        queue.work(workers=0, once=True)
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.reader, post=post).exists()
+        )
+
+    def test_comment_notifies_post_author(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Класс!')
+        Comment.objects.create(post=post, author=self.author, text='Спасибо')
+        self.assertEqual(mail.outbox, [])
+        queue.work(workers=0, once=True)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['author@example.com'])
+        self.assertIn('Класс!', mail.outbox[0].body)
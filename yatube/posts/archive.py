@@ -0,0 +1,99 @@
+import csv
+import json
+import zipfile
+
+from django.core.files.storage import default_storage
+
+CHUNK_SIZE = 500
+FILE_CHUNK_SIZE = 64 * 1024
+FIELDS = ('id', 'pub_date', 'updated', 'group__slug', 'text', 'image',
+          'comments_count')
+HEADER = ('id', 'pub_date', 'updated', 'group', 'text', 'image',
+          'comments_count')
+
+
+def _rows(user):
+    # Серверный курсор пачками: в памяти не больше CHUNK_SIZE постов
+    return user.posts.order_by('pub_date', 'pk').values_list(
+        *FIELDS
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _record(row):
+    record = dict(zip(HEADER, row))
+    for key in ('pub_date', 'updated'):
+        record[key] = record[key].isoformat()
+    return record
+
+
+class _Echo:
+    """Файл, который ничего не хранит, а отдаёт записанное обратно."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(user):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADER)
+    for row in _rows(user):
+        record = _record(row)
+        yield writer.writerow([record[key] for key in HEADER])
+
+
+def ndjson_chunks(user):
+    for row in _rows(user):
+        yield json.dumps(_record(row), ensure_ascii=False) + '\n'
+
+
+class _Pipe:
+    """Поток без перемотки для zipfile: байты забираются по мере записи."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_chunks(user):
+    """Zip с posts.ndjson и картинками постов, собираемый на лету.
+
+    zipfile умеет писать в поток без seek (размеры уходят в дескрипторы
+    после данных), поэтому временные файлы не нужны.
+    """
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('posts.ndjson', 'w') as entry:
+            for line in ndjson_chunks(user):
+                entry.write(line.encode())
+                if len(pipe.chunks) > 16:
+                    yield pipe.take()
+        yield pipe.take()
+        images = user.posts.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct().iterator(chunk_size=CHUNK_SIZE)
+        for name in images:
+            if not default_storage.exists(name):
+                continue
+            info = zipfile.ZipInfo(f'images/{name}')
+            # Картинки уже сжаты, второй раз их не жмём
+            info.compress_type = zipfile.ZIP_STORED
+            with default_storage.open(name) as source:
+                with archive.open(info, 'w', force_zip64=True) as entry:
+                    for chunk in iter(
+                        lambda: source.read(FILE_CHUNK_SIZE), b''
+                    ):
+                        entry.write(chunk)
+                        yield pipe.take()
+            yield pipe.take()
+    yield pipe.take()
@@ -0,0 +1,85 @@
+import time
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from yatube.settings import INDEX_CACHE_TIMEOUT, SHARED_CACHE
+
+POSTS_GENERATION = 'posts:generation'
+FEED_GENERATION = 'posts:feed-generation:{}'
+# Без общего кэша поколение в других процессах не меняется, и по нему
+# отдавались бы старые ETag; пусть хотя бы истекает вместе с фрагментами.
+GENERATION_TIMEOUT = None if SHARED_CACHE else INDEX_CACHE_TIMEOUT
+
+
+def _seed():
+    # Поколение начинается со времени, а не с единицы: после вытеснения
+    # ключа из кэша старые фрагменты не совпадут с новым поколением.
+    return int(time.time() * 1000000)
+
+
+def generation(key=POSTS_GENERATION):
+    """Текущее поколение данных; входит в ключи кэшированных фрагментов."""
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _seed(), GENERATION_TIMEOUT)
+        value = cache.get(key)
+    return value
+
+
+def bump_generation(key=POSTS_GENERATION):
+    """Делает устаревшими все фрагменты, построенные на этом поколении."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        value = _seed()
+        cache.set(key, value, GENERATION_TIMEOUT)
+        return value
+
+
+def feed_generation_key(user_id):
+    """Поколение ленты подписок пользователя; меняется при (от)писке."""
+    return FEED_GENERATION.format(user_id)
+
+
+def count_generation_key(scope, pk=''):
+    """Поколение числа записей в списке (всех постов, группы, лент).
+
+    Меняется, только когда в списке появляются или исчезают посты,
+    а не при любой правке, как общее поколение.
+    """
+    return f'posts:count-generation:{scope}:{pk}'
+
+
+def count_key(*parts):
+    """Ключ кэша для числа записей в списке постов."""
+    return ':'.join(['posts:count', *(str(part) for part in parts)])
+
+
+def fragment_cached(fragment_name, *vary_on):
+    """Проверяет, есть ли в кэше фрагмент шаблона {% cache %}."""
+    key = make_template_fragment_key(fragment_name, vary_on)
+    return cache.get(key) is not None
+
+
+def card_version_key(kind, value):
+    """Версия карточек постов автора, группы или картинки."""
+    return f'posts:card-version:{kind}:{value}'
+
+
+def card_version(post):
+    """Сводная версия для ключа кэша карточки поста.
+
+    Правка автора, группы или готовые миниатюры поднимают свою версию,
+    и старые карточки больше не находятся, а updated постов не меняется.
+    """
+    keys = [card_version_key('author', post.author_id)]
+    if post.group_id:
+        keys.append(card_version_key('group', post.group_id))
+    if post.image:
+        keys.append(card_version_key('image', post.image.name))
+    values = cache.get_many(keys)
+    return '.'.join(
+        str(values[key] if key in values else generation(key))
+        for key in keys
+    )
@@ -0,0 +1,51 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, Profile, User
+
+
+def bump(model, lookup, field, delta):
+    """Атомарно изменяет счётчик через F(), не уходя ниже нуля."""
+    queryset = model.objects.filter(**lookup)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def bump_profile(user_id, field, delta):
+    if not bump(Profile, {'user_id': user_id}, field, delta) and delta > 0:
+        # Профиль мог не появиться, если пользователь создан в обход
+        # сигналов - создаём и повторяем.
+        Profile.objects.get_or_create(user_id=user_id)
+        bump(Profile, {'user_id': user_id}, field, delta)
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('*'))
+        .values('total')
+    ), 0)
+
+
+def reconcile():
+    """Пересчитывает все счётчики по фактическим данным."""
+    Profile.objects.bulk_create(
+        (
+            Profile(user_id=pk)
+            for pk in User.objects.filter(
+                profile__isnull=True
+            ).values_list('pk', flat=True).iterator()
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    profiles = Profile.objects.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+    posts = Post.objects.update(
+        comments_count=_count(Comment.objects.all(), 'post'),
+    )
+    return profiles, posts
@@ -0,0 +1,73 @@
+"""Валидаторы для условных GET-запросов к страницам постов.
+
+ETag считается без рендера шаблона: для списков - по поколению постов
+из кэша, для поста - одним запросом за полями, которые выводит страница.
+В каждый ETag входит зритель, так как шапка и кнопки у всех разные.
+"""
+import hashlib
+
+from django.db.models import OuterRef, Subquery
+from django.middleware.csrf import get_token
+
+from . import cache
+from .models import Comment, Post, User
+
+
+def _etag(*parts):
+    raw = '|'.join(str(part) for part in parts)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _viewer(request):
+    return request.user.pk if request.user.is_authenticated else 'anon'
+
+
+def _query(request):
+    return request.GET.urlencode()
+
+
+def index(request):
+    return _etag('index', cache.generation(), _viewer(request),
+                 _query(request))
+
+
+def group_posts(request, slug):
+    return _etag('group', slug, cache.generation(), _viewer(request),
+                 _query(request))
+
+
+def profile(request, username):
+    counters = User.objects.filter(username=username).values_list(
+        'profile__followers_count', 'profile__following_count',
+    ).first()
+    if counters is None:
+        return None
+    # Подписка зрителя меняет кнопку, а она - поколение его ленты
+    feed = (
+        cache.generation(cache.feed_generation_key(request.user.pk))
+        if request.user.is_authenticated else None
+    )
+    return _etag('profile', username, cache.generation(), counters, feed,
+                 _viewer(request), _query(request))
+
+
+def post_detail(request, post_id):
+    # Число комментариев не меняется, если один удалили, а другой
+    # добавили, - поэтому в ключ входит и последний id
+    last_comment = Comment.objects.filter(post=OuterRef('pk')).order_by(
+        '-created', '-id'
+    ).values('id')[:1]
+    state = Post.objects.filter(pk=post_id).annotate(
+        last_comment=Subquery(last_comment),
+    ).values_list(
+        'updated', 'comments_count', 'last_comment',
+        'author__profile__posts_count', 'group__title',
+    ).first()
+    if state is None:
+        return None
+    # В странице форма комментария с CSRF-токеном: после смены токена
+    # (например, при новом входе) старая копия дала бы 403 на отправке.
+    # get_token заодно выставит cookie, если её ещё нет.
+    get_token(request)
+    return _etag('post', post_id, *state, request.META['CSRF_COOKIE'],
+                 _viewer(request), _query(request))
@@ -0,0 +1,54 @@
+from .models import FeedItem, Follow, Post
+
+FEED_BATCH_SIZE = 500
+
+
+def fan_out(post):
+    """Раскладывает новый пост в ленты всех подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, post_id=post.pk,
+                     author_id=post.author_id, pub_date=post.pub_date)
+            for user_id in followers.iterator()
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту подписчика уже опубликованные посты автора."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    FeedItem.objects.bulk_create(
+        (
+            FeedItem(user_id=user_id, post_id=pk,
+                     author_id=author_id, pub_date=pub_date)
+            for pk, pub_date in posts.iterator()
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def trim(user_id, author_id):
+    """Убирает из ленты посты автора, от которого отписались."""
+    FeedItem.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_ids=None):
+    """Пересобирает ленты целиком по текущим подпискам."""
+    follows = Follow.objects.all()
+    items = FeedItem.objects.all()
+    if user_ids is not None:
+        follows = follows.filter(user_id__in=user_ids)
+        items = items.filter(user_id__in=user_ids)
+    items.delete()
+    for user_id, author_id in follows.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        backfill(user_id, author_id)
@@ -1,5 +1,8 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.utils.translation import gettext_lazy as _
 from django import forms
+from PIL import Image
+from . import images
 from . models import Post, Comment
 
 
@@ -14,6 +17,22 @@ class PostForm(forms.ModelForm):
             'text': _('Введите текст поста'),
         }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            try:
+                image, width, height = images.normalize(image)
+            except (OSError, SyntaxError, Image.DecompressionBombError):
+                raise forms.ValidationError(
+                    _('Не удалось прочитать картинку: файл повреждён '
+                      'или слишком большой.')
+                )
+            self.instance.image_width = width
+            self.instance.image_height = height
+        elif not image:
+            self.instance.image_width = self.instance.image_height = None
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
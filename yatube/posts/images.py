@@ -0,0 +1,103 @@
+import io
+import os
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageOps, ImageSequence, features
+from yatube.settings import (POST_IMAGE_MAX_ANIMATION_PIXELS,
+                             POST_IMAGE_MAX_SIZE, POST_IMAGE_QUALITY,
+                             POST_IMAGE_WIDTHS)
+
+# Пропорции баннера, в который обрезаются картинки в лентах
+BANNER_WIDTH, BANNER_HEIGHT = 960, 339
+
+
+def _encoding(image):
+    """Формат, расширение и параметры сохранения для картинки."""
+    if features.check('webp'):
+        return 'WEBP', 'webp', {'quality': POST_IMAGE_QUALITY, 'method': 6}
+    if image.mode in ('RGBA', 'LA'):
+        return 'PNG', 'png', {'optimize': True}
+    return 'JPEG', 'jpg', {
+        'quality': POST_IMAGE_QUALITY, 'optimize': True, 'progressive': True,
+    }
+
+
+def _animated_encoding():
+    if features.check('webp_anim'):
+        return 'WEBP', 'webp', {'quality': POST_IMAGE_QUALITY, 'method': 4}
+    return 'GIF', 'gif', {'optimize': True}
+
+
+def _animated(image):
+    """Анимация ли это, которую по силам распаковать целиком."""
+    if not getattr(image, 'is_animated', False):
+        return False
+    width, height = image.size
+    return image.n_frames * width * height <= POST_IMAGE_MAX_ANIMATION_PIXELS
+
+
+def _frames(image):
+    """Кадры анимации, уменьшенные до POST_IMAGE_MAX_SIZE, и их паузы."""
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(image):
+        durations.append(frame.info.get('duration', 100))
+        frame = frame.convert('RGBA')
+        frame.thumbnail((POST_IMAGE_MAX_SIZE, POST_IMAGE_MAX_SIZE),
+                        Image.LANCZOS)
+        frames.append(frame)
+    return frames, durations
+
+
+def normalize(upload):
+    """Приводит загруженную картинку к разумному размеру и формату.
+
+    Поворачивает по EXIF-ориентации, уменьшает до POST_IMAGE_MAX_SIZE
+    по большей стороне и пересохраняет без метаданных. У анимации так
+    же обрабатывается каждый кадр, а от слишком тяжёлой анимации
+    остаётся первый кадр. Возвращает (файл, ширина, высота).
+    Битый файл приводит к OSError, SyntaxError или
+    Image.DecompressionBombError.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    buffer = io.BytesIO()
+    # Без exif= и прочего info метаданные не попадают в файл
+    if _animated(image):
+        frames, durations = _frames(image)
+        image_format, extension, options = _animated_encoding()
+        image = frames[0]
+        image.save(buffer, image_format, save_all=True,
+                   append_images=frames[1:], duration=durations, loop=0,
+                   **options)
+    else:
+        image = ImageOps.exif_transpose(image)
+        if image.mode == 'P':
+            image = image.convert('RGBA' if 'transparency' in image.info
+                                  else 'RGB')
+        elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            image = image.convert('RGB')
+        image.thumbnail((POST_IMAGE_MAX_SIZE, POST_IMAGE_MAX_SIZE),
+                        Image.LANCZOS)
+        image_format, extension, options = _encoding(image)
+        if image_format == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(buffer, image_format, **options)
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    normalized = SimpleUploadedFile(
+        f'{stem}.{extension}', buffer.getvalue(),
+        content_type=f'image/{image_format.lower()}',
+    )
+    return normalized, image.width, image.height
+
+
+def banner_geometry(width):
+    return f'{width}x{round(width * BANNER_HEIGHT / BANNER_WIDTH)}'
+
+
+def variant_widths(image_width=None):
+    """Ширины вариантов для srcset, не шире исходной картинки."""
+    widths = [
+        width for width in POST_IMAGE_WIDTHS
+        if image_width is None or width <= image_width
+    ]
+    return widths or [min(POST_IMAGE_WIDTHS)]
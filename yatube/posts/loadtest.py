@@ -0,0 +1,319 @@
+import io
+import math
+import queue
+import random
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from faker import Faker
+from mixer.backend.django import mixer
+from PIL import Image
+
+from users import urls as users_urls
+from . import transfer
+from . import urls as posts_urls
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 500
+IMAGE_COUNT = 5
+# Страницы для гостя: залогиненного пользователя они бы перенаправили
+# или разлогинили раньше времени.
+ANONYMOUS_ROUTES = {
+    'users:signup', 'users:login', 'users:password_reset',
+    'users:password_reset_done', 'users:password_reset_confirm',
+    'users:password_reset_complete',
+}
+POST_ROUTES = {'posts:post_create', 'posts:add_comment'}
+
+fake = Faker('ru_RU')
+
+
+def _images(tag):
+    """Несколько картинок в хранилище, общих для всех постов прогона."""
+    names = []
+    for i in range(IMAGE_COUNT):
+        color = tuple(random.randrange(256) for _ in range(3))
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), color).save(buffer, 'PNG')
+        names.append(default_storage.save(
+            f'posts/loadtest_{tag}_{i}.png', buffer
+        ))
+    return names
+
+
+def _follow_pairs(user_ids, follows):
+    """Подписки со степенным распределением популярности авторов.
+
+    Вес автора обратно пропорционален его месту в случайном рейтинге,
+    так что немногие авторы собирают большую часть подписчиков.
+    """
+    authors = random.sample(user_ids, len(user_ids))
+    weights = [1 / rank for rank in range(1, len(authors) + 1)]
+    for user_id in user_ids:
+        wanted = min(int(random.expovariate(1 / follows)), len(authors) - 1)
+        chosen = set(random.choices(authors, weights, k=wanted))
+        chosen.discard(user_id)
+        for author_id in chosen:
+            yield user_id, author_id
+
+
+def seed(users=50, groups=5, posts=1000, comments=2000, follows=10,
+         image_ratio=0.2):
+    """Наполняет базу синтетическими данными и возвращает их объём.
+
+    Записи создаются пачками в обход сигналов, поэтому счётчики, ленты
+    и поисковый индекс затем пересобираются целиком.
+    """
+    tag = secrets.token_hex(3)
+    user_list = mixer.cycle(users).blend(
+        User, username=mixer.sequence(f'load_{tag}_{{0}}'),
+    )
+    group_list = mixer.cycle(groups).blend(
+        Group, slug=mixer.sequence(f'load-{tag}-{{0}}'),
+    )
+    user_ids = [user.pk for user in user_list]
+    group_ids = [group.pk for group in group_list] + [None]
+    images = _images(tag) if image_ratio else []
+
+    Post.objects.bulk_create(
+        (
+            Post(
+                author_id=random.choice(user_ids),
+                group_id=random.choice(group_ids),
+                text=fake.text(max_nb_chars=400),
+                image=(random.choice(images)
+                       if random.random() < image_ratio else ''),
+            )
+            for _ in range(posts)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    post_ids = list(
+        Post.objects.filter(author_id__in=user_ids)
+        .values_list('pk', flat=True)
+    )
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                post_id=random.choice(post_ids),
+                author_id=random.choice(user_ids),
+                text=fake.sentence(),
+            )
+            for _ in range(comments if post_ids else 0)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Follow.objects.bulk_create(
+        (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in _follow_pairs(user_ids, follows)
+        ),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+    transfer.rebuild_derived()
+    return {
+        'users': User.objects.count(),
+        'groups': Group.objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+        'follows': Follow.objects.count(),
+    }
+
+
+def route_names():
+    """Имена всех маршрутов posts и users, которые нужно прогнать."""
+    names = []
+    for module in (posts_urls, users_urls):
+        for pattern in module.urlpatterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                names.append(f'{module.app_name}:{pattern.name}')
+    return names
+
+
+def _converters(name):
+    app_name, url_name = name.split(':')
+    module = posts_urls if app_name == 'posts' else users_urls
+    for pattern in module.urlpatterns:
+        if getattr(pattern, 'name', None) == url_name:
+            return list(pattern.pattern.converters)
+    return []
+
+
+class Scenario:
+    """Строит конкретный запрос к маршруту для заданного пользователя."""
+
+    def __init__(self):
+        self.usernames = list(
+            User.objects.values_list('username', flat=True)
+        )
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+        self.group_ids = list(Group.objects.values_list('pk', flat=True))
+        if not (self.usernames and self.post_ids):
+            raise ValueError('Нет данных: сначала заполните базу')
+
+    def kwargs(self, name, user):
+        values = {}
+        for key in _converters(name):
+            if key == 'slug':
+                values[key] = random.choice(self.slugs)
+            elif key == 'username':
+                values[key] = random.choice(self.usernames)
+            elif key == 'post_id':
+                values[key] = self._post_id(name, user)
+            elif key == 'uidb64':
+                values[key] = urlsafe_base64_encode(force_bytes(user.pk))
+            elif key == 'token':
+                values[key] = default_token_generator.make_token(user)
+            else:
+                raise ValueError(f'Нет значения для {key} в {name}')
+        return values
+
+    def _post_id(self, name, user):
+        if name == 'posts:post_edit':
+            # Редактировать можно только свой пост
+            own = user.posts.values_list('pk', flat=True).first()
+            if own is not None:
+                return own
+        return random.choice(self.post_ids)
+
+    def request(self, name, user):
+        """Возвращает (метод, путь, данные, нужен_ли_вход)."""
+        path = reverse(name, kwargs=self.kwargs(name, user))
+        data = None
+        if name == 'posts:post_create':
+            data = {'text': fake.text(max_nb_chars=200)}
+            if self.group_ids:
+                data['group'] = random.choice(self.group_ids)
+        elif name == 'posts:add_comment':
+            data = {'text': fake.sentence()}
+        method = 'post' if name in POST_ROUTES else 'get'
+        return method, path, data, name not in ANONYMOUS_ROUTES
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _worker(jobs, users, scenario, measure):
+    user = random.choice(users)
+    anonymous, member = Client(), Client()
+    member.force_login(user)
+    samples = []
+    try:
+        while True:
+            try:
+                name = jobs.get_nowait()
+            except queue.Empty:
+                return samples
+            method, path, data, login = scenario.request(name, user)
+            client = member if login else anonymous
+            counter = _QueryCounter()
+            status = None
+            started = time.perf_counter()
+            try:
+                with connection.execute_wrapper(counter):
+                    response = getattr(client, method)(path, data)
+                status = response.status_code
+            except Exception:
+                pass
+            elapsed = time.perf_counter() - started
+            if name == 'users:logout':
+                member.force_login(user)
+            if measure:
+                samples.append((name, elapsed, counter.count, status))
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def _drive(names, rounds, concurrency, users, scenario, measure):
+    jobs = queue.Queue()
+    order = [name for _ in range(rounds) for name in names]
+    random.shuffle(order)
+    for name in order:
+        jobs.put(name)
+    if concurrency <= 1:
+        return _worker(jobs, users, scenario, measure)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_worker, jobs, users, scenario, measure)
+            for _ in range(concurrency)
+        ]
+        return [sample for future in futures for sample in future.result()]
+
+
+def _summary(samples, wall_time=None):
+    latencies = [elapsed * 1000 for _, elapsed, _, _ in samples]
+    queries = [count for _, _, count, _ in samples]
+    statuses = {}
+    for *_, status in samples:
+        key = str(status) if status is not None else 'exception'
+        statuses[key] = statuses.get(key, 0) + 1
+    summary = {
+        'requests': len(samples),
+        'errors': sum(
+            1 for *_, status in samples if status is None or status >= 500
+        ),
+        'statuses': statuses,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'mean_ms': sum(latencies) / len(latencies) if latencies else None,
+        'queries_per_request': (
+            sum(queries) / len(queries) if queries else None
+        ),
+        'max_queries': max(queries) if queries else None,
+    }
+    if wall_time is not None:
+        summary['wall_time_s'] = wall_time
+        summary['throughput_rps'] = (
+            len(samples) / wall_time if wall_time else None
+        )
+    return summary
+
+
+def run(rounds=20, concurrency=4, warmup=1, routes=None):
+    """Прогоняет маршруты и возвращает сводку задержек и запросов."""
+    names = routes or route_names()
+    scenario = Scenario()
+    users = list(User.objects.order_by('?')[:max(concurrency, 1) * 2])
+    if warmup:
+        _drive(names, warmup, concurrency, users, scenario, measure=False)
+    started = time.perf_counter()
+    samples = _drive(names, rounds, concurrency, users, scenario, True)
+    wall_time = time.perf_counter() - started
+    by_route = {}
+    for sample in samples:
+        by_route.setdefault(sample[0], []).append(sample)
+    return {
+        'total': _summary(samples, wall_time),
+        'routes': {
+            name: _summary(by_route.get(name, [])) for name in names
+        },
+    }
@@ -0,0 +1,32 @@
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает группы, посты, комментарии и подписки в NDJSON '
+            '(файл .gz сжимается)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='файл, по умолчанию stdout')
+        parser.add_argument('--batch-size', type=int,
+                            default=transfer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['output']
+        if not path:
+            return self.write(self.stdout, options['batch_size'])
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as file:
+            rows = self.write(file, options['batch_size'])
+        self.stderr.write(f'Выгружено строк: {rows}')
+
+    @staticmethod
+    def write(file, batch_size):
+        rows = 0
+        for line in transfer.export_rows(batch_size):
+            file.write(line + '\n')
+            rows += 1
+        return rows
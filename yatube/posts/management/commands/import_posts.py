@@ -0,0 +1,44 @@
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = 'Загружает NDJSON из export_posts пачками через bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='файл (.gz - сжатый) или -')
+        parser.add_argument('--batch-size', type=int,
+                            default=transfer.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['input']
+        if path == '-':
+            stats = self.load(sys.stdin, options['batch_size'])
+        else:
+            opener = gzip.open if path.endswith('.gz') else open
+            with opener(path, 'rt', encoding='utf-8') as file:
+                stats = self.load(file, options['batch_size'])
+        total_rows = total_time = 0
+        for kind, (rows, elapsed) in stats.items():
+            total_rows += rows
+            total_time += elapsed
+            self.stdout.write(self.rate(kind, rows, elapsed))
+        self.stdout.write(self.style.SUCCESS(
+            self.rate('всего', total_rows, total_time)
+        ))
+
+    @staticmethod
+    def load(file, batch_size):
+        try:
+            return transfer.import_rows(file, batch_size)
+        except (ValueError, KeyError) as error:
+            raise CommandError(f'Ошибка в данных: {error}')
+
+    @staticmethod
+    def rate(kind, rows, elapsed):
+        per_second = rows / elapsed if elapsed else rows
+        return f'{kind}: {rows} строк, {per_second:.0f} строк/с'
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import loadtest
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими данными и замеряет задержки '
+            'всех страниц posts и users')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-seed', action='store_true',
+                            help='не заполнять базу, взять имеющиеся данные')
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=5)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--follows', type=float, default=10,
+                            help='среднее число подписок на пользователя')
+        parser.add_argument('--image-ratio', type=float, default=0.2,
+                            help='доля постов с картинкой')
+        parser.add_argument('--rounds', type=int, default=20,
+                            help='сколько раз запросить каждый маршрут')
+        parser.add_argument('--warmup', type=int, default=1,
+                            help='прогревочные проходы без замеров')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--route', action='append', dest='routes',
+                            help='только этот маршрут (можно несколько раз)')
+        parser.add_argument('--output', help='файл для отчёта JSON')
+
+    def handle(self, *args, **options):
+        unknown = set(options['routes'] or []) - set(loadtest.route_names())
+        if unknown:
+            raise CommandError(f'Неизвестные маршруты: {sorted(unknown)}')
+        config = {
+            key: options[key] for key in (
+                'users', 'groups', 'posts', 'comments', 'follows',
+                'image_ratio', 'rounds', 'warmup', 'concurrency',
+            )
+        }
+        dataset = None
+        if not options['no_seed']:
+            dataset = loadtest.seed(
+                users=options['users'],
+                groups=options['groups'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+                image_ratio=options['image_ratio'],
+            )
+        try:
+            report = loadtest.run(
+                rounds=options['rounds'],
+                concurrency=options['concurrency'],
+                warmup=options['warmup'],
+                routes=options['routes'],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        report.update(config=config, dataset=dataset)
+        text = json.dumps(report, indent=2, sort_keys=True,
+                          ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(text + '\n')
+        else:
+            self.stdout.write(text)
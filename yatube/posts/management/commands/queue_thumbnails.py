@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Ставит в очередь миниатюры картинок уже опубликованных '
+            'постов: загруженных до фоновой генерации или тех, чья '
+            'задача исчерпала попытки')
+
+    def handle(self, *args, **options):
+        names = Post.objects.exclude(image='').order_by().values_list(
+            'image', flat=True
+        ).distinct()
+        count = 0
+        for name in names.iterator():
+            thumbnails.schedule(name)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Картинок в очереди: {count}'))
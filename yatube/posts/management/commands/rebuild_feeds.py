@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', type=int, action='append', dest='user_ids',
+            help='id пользователя (можно несколько раз), по умолчанию все',
+        )
+
+    def handle(self, *args, **options):
+        feed.rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS('Ленты пересобраны'))
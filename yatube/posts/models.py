@@ -42,11 +42,13 @@ class Group(models.Model):
 class Post(models.Model):
     text = models.TextField(verbose_name='текст поста')
     pub_date = models.DateTimeField('published_date_post', auto_now_add=True)
+    updated = models.DateTimeField('дата изменения', auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='posts',
-        verbose_name='автор поста'
+        verbose_name='автор поста',
+        db_index=False
     )
     group = models.ForeignKey(
         Group,
@@ -54,31 +56,72 @@ class Post(models.Model):
         blank=True,
         null=True,
         related_name='group_name',
-        verbose_name='имя группы'
+        verbose_name='имя группы',
+        db_index=False
     )
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
         blank=True
     )
+    # Размеры заполняет форма при загрузке; width_field у ImageField
+    # открывал бы файл при каждой загрузке поста из базы.
+    image_width = models.PositiveIntegerField(
+        'ширина картинки', null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'высота картинки', null=True, editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        'число комментариев', default=0, editable=False
+    )
 
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Группа на момент загрузки: сигналы узнают перенос поста
+        # без лишнего запроса
+        if 'group_id' in field_names:
+            instance._loaded_group_id = instance.group_id
+        return instance
+
     class Meta:
         ordering = ['-pub_date']
+        # Индексы под ленты: вся лента, автор и группа по дате.
+        # Обратный проход по возрастающему индексу даёт порядок
+        # (pub_date DESC, id DESC) без сортировки. Одиночные индексы
+        # внешних ключей покрываются составными.
+        indexes = [
+            models.Index(fields=['pub_date'],
+                         name='posts_post_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='posts_post_author_date_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='posts_post_group_date_idx'),
+        ]
 
 
 class Comment(models.Model):
     post = models.ForeignKey('posts.Post',
                              on_delete=models.CASCADE,
-                             related_name='comments')
+                             related_name='comments',
+                             db_index=False)
     author = models.ForeignKey(get_user_model(),
                                on_delete=models.CASCADE,
                                related_name='comments')
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        ordering = ('created',)
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='posts_comment_post_date_idx'),
+        ]
+
     def __str__(self):
         return self.text
 
@@ -89,7 +132,56 @@ class Comment(models.Model):
 class Follow(models.Model):
     user = models.ForeignKey(get_user_model(),
                              on_delete=models.CASCADE,
-                             related_name='follower')
+                             related_name='follower',
+                             db_index=False)
     author = models.ForeignKey(get_user_model(),
                                on_delete=models.CASCADE,
                                related_name='following')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'author'],
+                                    name='posts_follow_unique_user_author'),
+        ]
+
+
+class Profile(models.Model):
+    """Счётчики пользователя, которые поддерживаются при записи."""
+    user = models.OneToOneField(get_user_model(),
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='profile')
+    posts_count = models.PositiveIntegerField('число постов', default=0)
+    followers_count = models.PositiveIntegerField('подписчиков', default=0)
+    following_count = models.PositiveIntegerField('подписок', default=0)
+
+    def __str__(self):
+        return str(self.user)
+
+
+class FeedItem(models.Model):
+    """Запись ленты подписок, материализованная при публикации поста."""
+    user = models.ForeignKey(get_user_model(),
+                             on_delete=models.CASCADE,
+                             related_name='feed',
+                             db_index=False)
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='feed_items')
+    author = models.ForeignKey(get_user_model(),
+                               on_delete=models.CASCADE,
+                               related_name='+')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        indexes = [
+            models.Index(fields=['user', 'pub_date', 'post'],
+                         name='posts_feed_user_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='posts_feed_user_author_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'],
+                                    name='posts_feed_unique_user_post'),
+        ]
@@ -0,0 +1,267 @@
+import base64
+import binascii
+import collections.abc
+from functools import reduce
+import operator
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from core import routers
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу (keyset) вместо OFFSET.
+
+    Страница задаётся непрозрачным курсором, в котором закодированы
+    значения полей сортировки крайней записи. Запрос к любой странице
+    стоит столько же, сколько к первой, и не требует COUNT(*).
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering or self._default_ordering(queryset))
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    @staticmethod
+    def _default_ordering(queryset):
+        """Сортировка набора, дополненная первичным ключом.
+
+        Ключ делает порядок строгим: без него записи с одинаковой
+        датой могли бы потеряться или повториться на соседних страницах.
+        """
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        pk = queryset.model._meta.pk.attname
+        if not any(name.lstrip('-') in ('pk', pk) for name in ordering):
+            sign = '-' if ordering and ordering[0].startswith('-') else ''
+            ordering.append(sign + pk)
+        return ordering
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу; испорченный курсор ведёт на первую."""
+        try:
+            after = self.decode_cursor(after) if after else None
+            before = self.decode_cursor(before) if before else None
+        except InvalidCursor:
+            after = before = None
+        return CursorPage(self, after=after, before=before)
+
+    def encode_cursor(self, obj):
+        values = []
+        for name in self.fields:
+            value = getattr(obj, name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(str(value))
+        raw = '|'.join(values).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        except (binascii.Error, UnicodeError, ValueError):
+            raise InvalidCursor(token)
+        values = raw.split('|')
+        if len(values) != len(self.fields):
+            raise InvalidCursor(token)
+        model = self.queryset.model
+        try:
+            return tuple(
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            )
+        except Exception:
+            raise InvalidCursor(token)
+
+    def _keyset_filter(self, values, forward):
+        """Условие «строго после values» в порядке сортировки.
+
+        Для (a, b) по убыванию это (a < x) OR (a = x AND b < y).
+        """
+        conditions = []
+        for i, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            equal = {
+                field: value
+                for field, value in zip(self.fields[:i], values[:i])
+            }
+            equal[f'{self.fields[i]}__{lookup}'] = values[i]
+            conditions.append(Q(**equal))
+        return reduce(operator.or_, conditions)
+
+    def _reversed_ordering(self):
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    def fetch(self, after=None, before=None):
+        """Возвращает (записи, есть_ещё) для страницы после/до курсора."""
+        limit = self.per_page + 1
+        if before is not None:
+            queryset = self.queryset.filter(
+                self._keyset_filter(before, forward=False)
+            ).order_by(*self._reversed_ordering())
+            rows = list(queryset[:limit])
+            has_more = len(rows) > self.per_page
+            return rows[:self.per_page][::-1], has_more
+        queryset = self.queryset.order_by(*self.ordering)
+        if after is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(after, forward=True)
+            )
+        rows = list(queryset[:limit])
+        return rows[:self.per_page], len(rows) > self.per_page
+
+
+class CursorPage(collections.abc.Sequence):
+    """Страница курсорного пагинатора, загружается при первом обращении."""
+
+    is_cursor = True
+
+    def __init__(self, paginator, after=None, before=None):
+        self.paginator = paginator
+        self.after = after
+        self.before = before
+
+    def __repr__(self):
+        return '<Cursor page of %s>' % len(self)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @cached_property
+    def _result(self):
+        return self.paginator.fetch(after=self.after, before=self.before)
+
+    @cached_property
+    def object_list(self):
+        # Представление можно подменить (например, записями вместо
+        # элементов ленты) - курсоры всё равно строятся по исходным строкам.
+        return self._result[0]
+
+    def has_next(self):
+        if self.before is not None:
+            return True
+        return self._result[1]
+
+    def has_previous(self):
+        if self.before is not None:
+            return self._result[1]
+        return self.after is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        rows = self._result[0]
+        if self.has_next() and rows:
+            return self.paginator.encode_cursor(rows[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        rows = self._result[0]
+        if self.has_previous() and rows:
+            return self.paginator.encode_cursor(rows[0])
+        return None
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который берёт число записей из кэша.
+
+    В ключ входит поколение данных, поэтому после записи постов
+    COUNT(*) выполнится заново, а до тех пор не выполняется вовсе.
+    """
+
+    def __init__(self, object_list, per_page, cache_key, timeout=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.timeout = timeout
+
+    @cached_property
+    def count(self):
+        value = cache.get(self.cache_key)
+        if value is None:
+            value = super().count
+            # Число с отстающей реплики не должно пережить запрос
+            if not routers.replica_read():
+                cache.set(self.cache_key, value, self.timeout)
+        return value
+
+
+class KnownCountPaginator(Paginator):
+    """Paginator с готовым числом записей, например из счётчика профиля.
+
+    Счётчику верят, пока он сходится со страницей: строк на ней столько,
+    сколько он обещает, а за последней страницей ничего нет. Иначе
+    число записей считается заново.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        if self.known_count is None:
+            return super().count
+        return self.known_count
+
+    def _recount(self):
+        self.known_count = None
+        self.__dict__.pop('count', None)
+        self.__dict__.pop('num_pages', None)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            if self.known_count is None:
+                raise
+        # Страница за концом: возможно, счётчик отстал
+        self._recount()
+        return super().validate_number(number)
+
+    def page(self, number):
+        if self.known_count is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # Лишняя строка показывает, есть ли записи дальше
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if len(rows) == min(self.per_page + 1, self.count - bottom):
+            return self._get_page(rows[:self.per_page], number, self)
+        self._recount()
+        return super().page(number)
+
+
+def lazy_page(paginator, number):
+    """Страница без проверки номера и без COUNT(*).
+
+    Нужна, когда содержимое страницы уже есть в кэше: запросы выполнятся,
+    только если к странице всё же обратятся.
+    """
+    try:
+        number = max(int(number), 1)
+    except (TypeError, ValueError):
+        number = 1
+    bottom = (number - 1) * paginator.per_page
+    top = bottom + paginator.per_page
+    return Page(paginator.object_list[bottom:top], number, paginator)
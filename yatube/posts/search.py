@@ -0,0 +1,128 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+# Управляющие символы не встречаются в тексте постов, поэтому ими
+# помечаем совпадения до экранирования HTML.
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 24
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def index_post(post):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def unindex_post(pk):
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+
+def rebuild():
+    """Переиндексирует все посты, например после массовой загрузки."""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+
+
+def match_expression(query):
+    """Строка запроса FTS5: все слова пользователя как фразы через AND.
+
+    Кавычки не дают словам вроде NOT или NEAR стать операторами.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def highlight(snippet):
+    html = escape(snippet)
+    html = html.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+class SearchResults:
+    """Найденные посты по релевантности; срезы понимает Paginator."""
+
+    def __init__(self, query):
+        self.query = query
+        self.expression = match_expression(query)
+
+    def count(self):
+        if not self.expression:
+            return 0
+        if not fts_available():
+            return self._fallback().count()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.expression],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = (index.stop or offset) - offset
+        if not self.expression or limit <= 0:
+            return []
+        if not fts_available():
+            return self._fallback_page(offset, limit)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, %s, %s) '
+                f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s OFFSET %s',
+                [MARK_START, MARK_END, '…', SNIPPET_TOKENS,
+                 self.expression, limit, offset],
+            )
+            rows = cursor.fetchall()
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [pk for pk, _ in rows]
+        )
+        results = []
+        for pk, snippet in rows:
+            post = posts.get(pk)
+            if post is not None:
+                post.snippet = highlight(snippet)
+                results.append(post)
+        return results
+
+    def _fallback(self):
+        return Post.objects.filter(text__icontains=self.query)
+
+    def _fallback_page(self, offset, limit):
+        posts = list(
+            self._fallback().select_related('author', 'group')
+            [offset:offset + limit]
+        )
+        for post in posts:
+            post.snippet = Truncator(post.text).words(SNIPPET_TOKENS)
+        return posts
@@ -0,0 +1,153 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+from . import cache, counters, feed, search, thumbnails
+from .models import Comment, Follow, Group, Post, Profile, User
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, **kwargs):
+    if created:
+        enqueue('posts.fan_out', instance.pk, key=f'fan_out:{instance.pk}')
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+        cache.bump_generation(cache.feed_generation_key(instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def unfollow_trim(sender, instance, **kwargs):
+    feed.trim(instance.user_id, instance.author_id)
+    cache.bump_generation(cache.feed_generation_key(instance.user_id))
+
+
+@receiver(post_save, sender=User)
+def user_profile(sender, instance, created, **kwargs):
+    if created:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def post_counters(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_profile(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_delete_counters(sender, instance, **kwargs):
+    counters.bump_profile(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_counters(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(Post, {'pk': instance.post_id}, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_delete_counters(sender, instance, **kwargs):
+    counters.bump(Post, {'pk': instance.post_id}, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_counters(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_profile(instance.user_id, 'following_count', 1)
+        counters.bump_profile(instance.author_id, 'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def unfollow_counters(sender, instance, **kwargs):
+    counters.bump_profile(instance.user_id, 'following_count', -1)
+    counters.bump_profile(instance.author_id, 'followers_count', -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def posts_changed(sender, **kwargs):
+    cache.bump_generation()
+
+
+@receiver(pre_save, sender=Post)
+def remember_group(sender, instance, update_fields, **kwargs):
+    # Пост могли перенести в другую группу: число записей изменится
+    # и у прежней группы. Группу знает пост, загруженный из базы;
+    # запрос нужен, только если пост собран вручную.
+    if instance._state.adding or (
+        update_fields is not None
+        and not {'group', 'group_id'} & update_fields
+    ):
+        instance._old_group_id = instance.group_id
+    elif hasattr(instance, '_loaded_group_id'):
+        instance._old_group_id = instance._loaded_group_id
+    else:
+        instance._old_group_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_list_counts(sender, instance, created, **kwargs):
+    groups = {instance.group_id, instance._old_group_id}
+    instance._loaded_group_id = instance.group_id
+    if created:
+        cache.bump_generation(cache.count_generation_key('index'))
+    elif len(groups) == 1:
+        return
+    for group_id in groups - {None}:
+        cache.bump_generation(cache.count_generation_key('group', group_id))
+
+
+@receiver(post_delete, sender=Post)
+def post_delete_list_counts(sender, instance, **kwargs):
+    cache.bump_generation(cache.count_generation_key('index'))
+    cache.bump_generation(cache.count_generation_key('feeds'))
+    if instance.group_id:
+        cache.bump_generation(
+            cache.count_generation_key('group', instance.group_id)
+        )
+
+
+@receiver(post_save, sender=Group)
+def group_cards(sender, instance, created, **kwargs):
+    if not created:
+        cache.bump_generation(cache.card_version_key('group', instance.pk))
+
+
+@receiver(post_save, sender=User)
+def author_cards(sender, instance, created, update_fields, **kwargs):
+    # Вход в систему сохраняет только last_login, карточки он не меняет
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    cache.bump_generation(cache.card_version_key('author', instance.pk))
+    cache.bump_generation()
+
+
+@receiver(post_save, sender=Post)
+def post_thumbnails(sender, instance, **kwargs):
+    if instance.image:
+        thumbnails.schedule(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def post_search_index(sender, instance, **kwargs):
+    enqueue('posts.index', instance.pk, key=f'index:{instance.pk}')
+
+
+@receiver(post_delete, sender=Post)
+def post_search_unindex(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_notification(sender, instance, created, **kwargs):
+    if created:
+        enqueue('posts.notify_comment', instance.pk,
+                key=f'notify_comment:{instance.pk}')
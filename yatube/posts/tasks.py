@@ -0,0 +1,49 @@
+"""Фоновые задачи постов; ставятся в очередь сигналами при записи."""
+from django.core.mail import send_mail
+from django.urls import reverse
+
+from jobs.queue import task
+
+from . import cache, feed, search, thumbnails
+from .models import Comment, Post
+
+
+@task('posts.fan_out')
+def fan_out(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        feed.fan_out(post)
+        # Посты попали в ленты подписчиков - их число устарело
+        cache.bump_generation(cache.count_generation_key('feeds'))
+
+
+@task('posts.index')
+def index(post_id):
+    post = Post.objects.filter(pk=post_id).only('pk', 'text').first()
+    if post is None:
+        search.unindex_post(post_id)
+    else:
+        search.index_post(post)
+
+
+task('posts.thumbnails')(thumbnails.generate)
+
+
+@task('posts.notify_comment')
+def notify_comment(comment_id):
+    """Письмо автору поста о новом комментарии."""
+    comment = Comment.objects.select_related(
+        'author', 'post__author'
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return
+    recipient = comment.post.author
+    if recipient == comment.author or not recipient.email:
+        return
+    send_mail(
+        f'Новый комментарий к посту #{comment.post_id}',
+        f'{comment.author.username}: {comment.text}\n\n'
+        f'{reverse("posts:post_detail", args=[comment.post_id])}',
+        None,
+        [recipient.email],
+    )
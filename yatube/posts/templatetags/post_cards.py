@@ -0,0 +1,16 @@
+from django import template
+
+from yatube.settings import POST_CARD_CACHE_TIMEOUT
+
+from posts import cache
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_cache(post):
+    """Срок жизни и версия фрагмента {% cache %} карточки поста."""
+    return {
+        'timeout': POST_CARD_CACHE_TIMEOUT,
+        'version': cache.card_version(post),
+    }
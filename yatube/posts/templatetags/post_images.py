@@ -0,0 +1,25 @@
+from django import template
+from sorl.thumbnail import default
+
+from posts.images import banner_geometry, variant_widths
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_srcset(post):
+    """srcset с готовыми вариантами баннера картинки поста.
+
+    Ещё не созданные в фоне варианты пропускаются, чтобы браузер
+    не принял исходник за картинку нужной ширины.
+    """
+    if not post.image:
+        return ''
+    candidates = []
+    for width in variant_widths(post.image_width):
+        thumbnail = default.backend.get_thumbnail(
+            post.image, banner_geometry(width), crop='center'
+        )
+        if thumbnail.name != post.image.name:
+            candidates.append(f'{thumbnail.url} {width}w')
+    return ', '.join(candidates)
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ProfileArchiveTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        group = Group.objects.create(
+            title='Группа', description='Описание', slug='archive'
+        )
+        with mock.patch('posts.thumbnails.schedule'):
+            cls.with_image = Post.objects.create(
+                author=cls.author, text='С картинкой, "в кавычках"',
+                group=group,
+                image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                         content_type='image/gif'),
+            )
+        cls.plain = Post.objects.create(author=cls.author, text='Простой')
+        Post.objects.create(author=cls.other, text='Чужой')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client.force_login(self.author)
+        self.url = reverse('posts:profile_archive', args=['author'])
+
+    def download(self, fmt):
+        response = self.client.get(self.url, {'format': fmt})
+        self.assertTrue(response.streaming)
+        self.assertIn(f'author-posts.{fmt}', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.download('csv').decode())))
+        self.assertEqual([row['text'] for row in rows],
+                         ['С картинкой, "в кавычках"', 'Простой'])
+        self.assertEqual(rows[0]['group'], 'archive')
+        self.assertEqual(rows[1]['image'], '')
+
+    def test_ndjson(self):
+        records = [
+            json.loads(line)
+            for line in self.download('ndjson').decode().splitlines()
+        ]
+        self.assertEqual([record['id'] for record in records],
+                         [self.with_image.id, self.plain.id])
+
+    def test_zip_contains_posts_and_images(self):
+        archive = zipfile.ZipFile(io.BytesIO(self.download('zip')))
+        self.assertIsNone(archive.testzip())
+        lines = archive.read('posts.ndjson').decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(
+            archive.read(f'images/{self.with_image.image.name}'), SMALL_GIF
+        )
+
+    def test_ndjson_is_streamed_row_by_row(self):
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(len(list(response.streaming_content)), 2)
+
+    def test_only_owner_can_download(self):
+        self.client.force_login(self.other)
+        response = self.client.get(self.url)
+        self.assertRedirects(
+            response, reverse('posts:profile', args=['author'])
+        )
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('users:login'), response['Location'])
+
+    def test_link_shown_to_owner_only(self):
+        profile = reverse('posts:profile', args=['author'])
+        self.assertContains(self.client.get(profile), self.url)
+        self.client.force_login(self.other)
+        self.assertNotContains(self.client.get(profile), self.url)
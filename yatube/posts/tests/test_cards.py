@@ -0,0 +1,103 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.cache import card_version
+from posts.models import Group, Post, User
+
+
+def card_key(post):
+    post.refresh_from_db()
+    return make_template_fragment_key(
+        'post_card',
+        [post.id, post.updated.timestamp(), card_version(post), 'v1'],
+    )
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', description='Описание', slug='card-group'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {i}', group=cls.group
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+
+    def test_listing_caches_every_card(self):
+        self.client.get(self.urls[0])
+        for post in self.posts:
+            with self.subTest(post=post.id):
+                self.assertIsNotNone(cache.get(card_key(post)))
+
+    def test_cached_card_is_reused(self):
+        self.client.get(self.urls[0])
+        # update() не трогает updated, поэтому карточка берётся из кэша
+        Post.objects.filter(pk=self.posts[0].pk).update(text='Тайком')
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Пост 0')
+                self.assertNotContains(response, 'Тайком')
+
+    def test_edit_invalidates_only_its_card(self):
+        self.client.get(self.urls[0])
+        untouched = card_key(self.posts[1])
+        post = self.posts[0]
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.client.get(self.urls[0])
+        self.assertContains(response, 'Исправленный пост')
+        self.assertIsNotNone(cache.get(untouched))
+        self.assertEqual(card_key(self.posts[1]), untouched)
+
+    def test_group_and_author_changes_refresh_cards(self):
+        for url in self.urls:
+            self.client.get(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.author.first_name = 'Алексей'
+        self.author.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'все записи группы Новое')
+                self.assertContains(response, 'Автор: Алексей Толстой')
+
+    def test_group_and_author_changes_keep_post_dates(self):
+        updated = list(
+            Post.objects.filter(author=self.author).values_list('updated')
+        )
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.author.first_name = 'Алексей'
+        self.author.save()
+        self.assertEqual(
+            list(Post.objects.filter(author=self.author).values_list(
+                'updated'
+            )),
+            updated,
+        )
+
+    def test_login_does_not_touch_cards(self):
+        before = card_key(self.posts[0])
+        self.author.set_password('secret')
+        self.author.save()
+        after_save = card_key(self.posts[0])
+        self.assertNotEqual(before, after_save)
+        self.client.login(username='author', password='secret')
+        self.assertEqual(card_key(self.posts[0]), after_save)
@@ -0,0 +1,81 @@
+import re
+
+from django.test import TestCase
+from django.urls import reverse
+from yatube.settings import COMMENTS_PER_PAGE
+
+from posts.models import Comment, Post, User
+
+
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Вирусный')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Комментарий №{i}.'
+            )
+            for i in range(COMMENTS_PER_PAGE * 2 + 5)
+        ]
+
+    @staticmethod
+    def texts(response):
+        return re.findall(r'Комментарий №\d+\.', response.content.decode())
+
+    @staticmethod
+    def fragment_url(response):
+        return re.search(
+            r'data-comments-url="([^"]+)"', response.content.decode()
+        ).group(1).replace('&amp;', '&')
+
+    def expected(self, start, stop):
+        return [comment.text for comment in self.comments[start:stop]]
+
+    def test_first_page_inline_then_fragments(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.id])
+        )
+        self.assertEqual(self.texts(response),
+                         self.expected(0, COMMENTS_PER_PAGE))
+
+        with self.assertNumQueries(1):
+            fragment = self.client.get(self.fragment_url(response))
+        self.assertTemplateNotUsed(fragment, 'base.html')
+        self.assertEqual(
+            self.texts(fragment),
+            self.expected(COMMENTS_PER_PAGE, COMMENTS_PER_PAGE * 2),
+        )
+
+        last = self.client.get(self.fragment_url(fragment))
+        self.assertEqual(self.texts(last),
+                         self.expected(COMMENTS_PER_PAGE * 2, None))
+        self.assertNotContains(last, 'data-comments-url')
+
+    def test_load_more_works_without_javascript(self):
+        first = self.client.get(
+            reverse('posts:post_detail', args=[self.post.id])
+        )
+        cursor = first.context['comments'].next_cursor
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.id]),
+            {'comments_after': cursor},
+        )
+        self.assertEqual(
+            self.texts(response),
+            self.expected(COMMENTS_PER_PAGE, COMMENTS_PER_PAGE * 2),
+        )
+
+    def test_comment_authors_are_joined(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.id])
+        )
+        with self.assertNumQueries(0):
+            for comment in response.context['comments']:
+                comment.author.username
+
+    def test_comments_of_missing_post_are_404(self):
+        response = self.client.get(
+            reverse('posts:post_comments', args=[self.post.id + 100])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, Profile, User
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_posts_count_follows_create_and_delete(self):
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        self.assertEqual(self.profile(self.author).posts_count, 3)
+        posts[0].delete()
+        self.assertEqual(self.profile(self.author).posts_count, 2)
+
+    def test_comments_count(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        Comment.objects.create(post=post, author=self.reader, text='Ещё')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_follow_counts(self):
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_counter_never_goes_negative(self):
+        Profile.objects.filter(user=self.author).update(posts_count=0)
+        post = Post.objects.create(author=self.author, text='Пост')
+        Profile.objects.filter(user=self.author).update(posts_count=0)
+        post.delete()
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Ок')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Profile.objects.filter(user=self.reader).delete()
+        Profile.objects.filter(user=self.author).update(
+            posts_count=42, followers_count=7
+        )
+        Post.objects.filter(pk=post.pk).update(comments_count=0)
+        call_command('reconcile_counters', stdout=StringIO())
+        author = self.profile(self.author)
+        self.assertEqual(
+            (author.posts_count, author.followers_count), (1, 1)
+        )
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_pages_read_counters(self):
+        Post.objects.create(author=self.author, text='Пост')
+        Profile.objects.filter(user=self.author).update(posts_count=99)
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertContains(response, 'Всего постов: 99')
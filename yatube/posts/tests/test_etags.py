@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', description='Описание', slug='etag-group'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.id]),
+        )
+
+    def revalidate(self, url):
+        etag = self.client.get(url)['ETag']
+        return etag, self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_answer_304_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                _, response = self.revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertFalse(response.templates)
+
+    def test_edited_post_changes_every_etag(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_new_comment_changes_detail_etag(self):
+        url = reverse('posts:post_detail', args=[self.post.id])
+        etag, _ = self.revalidate(url)
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_replaced_comment_changes_detail_etag(self):
+        url = reverse('posts:post_detail', args=[self.post.id])
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Первый'
+        )
+        etag, _ = self.revalidate(url)
+        comment.delete()
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_csrf_token_changes_detail_etag(self):
+        url = reverse('posts:post_detail', args=[self.post.id])
+        etag, _ = self.revalidate(url)
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 64
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile_etag(self):
+        url = reverse('posts:profile', args=[self.author.username])
+        etag, _ = self.revalidate(url)
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['following'])
+
+    def test_etag_depends_on_viewer(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.client.logout()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.client.force_login(self.reader)
+
+    def test_missing_post_is_still_404(self):
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.id + 100])
+        )
+        self.assertEqual(response.status_code, 404)
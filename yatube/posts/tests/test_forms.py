@@ -186,3 +186,11 @@ class CommentFormTest(TestCase):
             reverse('posts:post_detail', args=[self.post.id])
         )
         self.assertContains(response, 'Test comment')
+
+    def test_post_detail_does_not_take_comments(self):
+        url = reverse('posts:post_detail', args=[self.post.id])
+        for client in (self.guest_client, self.authorized_client):
+            with self.subTest(client=client):
+                response = client.post(url, data={'text': 'В обход'})
+                self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.post.comments.exists())
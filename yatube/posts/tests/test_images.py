@@ -0,0 +1,164 @@
+import io
+import re
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import images, thumbnails
+from posts.forms import PostForm
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+EXIF_ORIENTATION = 0x0112
+
+
+def upload(name, size, mode='RGB', image_format='JPEG', orientation=None):
+    buffer = io.BytesIO()
+    picture = Image.new(mode, size, (255, 0, 0, 128)[:len(mode)])
+    options = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = orientation
+        exif[0x010F] = 'Телефон автора'
+        options['exif'] = exif
+    picture.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type=f'image/{image_format.lower()}')
+
+
+class NormalizeTest(TestCase):
+    def test_large_photo_is_capped_rotated_and_stripped(self):
+        result, width, height = images.normalize(
+            upload('photo.JPG', (4000, 3000), orientation=6)
+        )
+        picture = Image.open(result)
+        # Ориентация 6 - поворот на 90°, большая сторона стала высотой
+        self.assertEqual((width, height), (1536, 2048))
+        self.assertEqual(picture.size, (width, height))
+        self.assertFalse(picture.getexif())
+        self.assertTrue(result.name.startswith('photo.'))
+        self.assertLess(result.size, 4000 * 3000)
+
+    def test_small_image_keeps_its_size_and_alpha(self):
+        result, width, height = images.normalize(
+            upload('shot.png', (300, 200), 'RGBA', 'PNG')
+        )
+        picture = Image.open(result)
+        self.assertEqual((width, height), (300, 200))
+        self.assertIn('A', picture.mode)
+
+    def test_animation_is_capped_and_keeps_frames(self):
+        buffer = io.BytesIO()
+        frames = [Image.new('RGB', (3000, 1000), color)
+                  for color in ('red', 'blue', 'green')]
+        frames[0].save(buffer, 'GIF', save_all=True,
+                       append_images=frames[1:], duration=50,
+                       comment=b'metadata')
+        result, width, height = images.normalize(SimpleUploadedFile(
+            'anim.gif', buffer.getvalue(), content_type='image/gif'
+        ))
+        picture = Image.open(result)
+        self.assertEqual((width, height), (2048, 683))
+        self.assertEqual(picture.size, (2048, 683))
+        self.assertEqual(picture.n_frames, 3)
+        self.assertNotIn('comment', picture.info)
+
+    def test_heavy_animation_keeps_first_frame(self):
+        buffer = io.BytesIO()
+        frames = [Image.new('RGB', (100, 100), color)
+                  for color in ('red', 'blue', 'green')]
+        frames[0].save(buffer, 'GIF', save_all=True,
+                       append_images=frames[1:], duration=50)
+        heavy = SimpleUploadedFile(
+            'anim.gif', buffer.getvalue(), content_type='image/gif'
+        )
+        # Кадры x пиксели на единицу больше предела
+        with mock.patch.object(images, 'POST_IMAGE_MAX_ANIMATION_PIXELS',
+                               3 * 100 * 100 - 1), \
+                mock.patch.object(images, '_frames') as decode:
+            result, width, height = images.normalize(heavy)
+        decode.assert_not_called()
+        picture = Image.open(result)
+        self.assertEqual((width, height), (100, 100))
+        self.assertFalse(getattr(picture, 'is_animated', False))
+        # Первый кадр красный; сжатие с потерями чуть сдвигает цвет
+        red, green, blue = picture.convert('RGB').getpixel((0, 0))
+        self.assertGreater(red, 200)
+        self.assertLess(max(green, blue), 50)
+
+    def test_variant_widths_do_not_exceed_image(self):
+        self.assertEqual(images.variant_widths(1000), [480, 960])
+        self.assertEqual(images.variant_widths(100), [480])
+        self.assertEqual(images.variant_widths(None), [480, 960, 1440])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadPipelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='photographer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_form_stores_normalized_image_with_size(self):
+        form = PostForm(
+            data={'text': 'Фото'},
+            files={'image': upload('big.jpg', (3000, 1000))},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.author = self.user
+        post = form.save()
+        self.assertEqual((post.image_width, post.image_height), (2048, 683))
+        extension = 'webp' if images.features.check('webp') else 'jpg'
+        self.assertTrue(post.image.name.endswith(f'.{extension}'))
+        with Image.open(post.image.path) as picture:
+            self.assertEqual(picture.size, (2048, 683))
+
+        form = PostForm(
+            data={'text': 'Без фото', 'image-clear': 'on'},
+            instance=post,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        post = form.save()
+        self.assertIsNone(post.image_width)
+
+    def test_srcset_lists_generated_variants(self):
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с баннером',
+            'image': upload('banner.jpg', (1200, 600)),
+        })
+        post = Post.objects.get()
+        thumbnails.generate(post.image.name)
+        response = self.client.get(reverse('posts:index'))
+        srcset = re.search(r'srcset="([^"]+)"', response.content.decode())
+        self.assertIsNotNone(srcset)
+        widths = re.findall(r' (\d+)w', srcset.group(1))
+        self.assertEqual(widths, ['480', '960'])
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_broken_image_is_a_form_error(self):
+        whole = upload('broken.jpg', (800, 600)).read()
+        broken = SimpleUploadedFile(
+            'broken.jpg', whole[:len(whole) // 2], content_type='image/jpeg'
+        )
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Битое фото', 'image': broken,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Не удалось прочитать картинку',
+                      response.context['form'].errors['image'][0])
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,56 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+
+from posts import loadtest
+from posts.models import Follow, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LoadtestCommandTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_and_drive_every_route(self):
+        out = StringIO()
+        call_command(
+            'loadtest', users=6, groups=2, posts=30, comments=20,
+            follows=2, rounds=1, warmup=0, concurrency=1, stdout=out,
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['dataset']['posts'], 30)
+        self.assertEqual(set(report['routes']), set(loadtest.route_names()))
+        self.assertEqual(report['total']['errors'], 0)
+        for name, summary in report['routes'].items():
+            with self.subTest(route=name):
+                self.assertEqual(summary['requests'], 1)
+                self.assertIsNotNone(summary['p99_ms'])
+        self.assertGreater(
+            report['routes']['posts:index']['queries_per_request'], 0
+        )
+        self.assertIn('throughput_rps', report['total'])
+
+    def test_seeded_counters_and_follows_are_consistent(self):
+        loadtest.seed(users=8, groups=1, posts=20, comments=5, follows=3,
+                      image_ratio=0.5)
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')
+        ).exists())
+        for user in User.objects.select_related('profile'):
+            self.assertEqual(user.profile.posts_count, user.posts.count())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50)
+        self.assertEqual(loadtest.percentile(values, 99), 99)
+        self.assertIsNone(loadtest.percentile([], 50))
@@ -1,7 +1,13 @@
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from yatube.settings import POSTS_PER_PAGE
-from posts.models import Group, Post, User
+from core.templatetags.pagination import page_window
+from posts import counters
+from posts.models import Follow, Group, Post, Profile, User
 
 
 class PaginatorViewsTest(TestCase):
@@ -15,6 +21,7 @@ class PaginatorViewsTest(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         # Создаем авторизованный клиент
         self.user = User.objects.create_user(username='StasBasov')
         self.authorized_client = Client()
@@ -33,6 +40,8 @@ class PaginatorViewsTest(TestCase):
                  )
             for i in range(13)
         ])
+        # bulk_create обходит сигналы, счётчик профиля пересчитываем
+        counters.reconcile()
 
     def test_first_page_contains_ten_records(self):
         urls = (
@@ -57,3 +66,216 @@ class PaginatorViewsTest(TestCase):
             response = self.client.get(url)
             amount_posts = len(response.context.get('page_obj').object_list)
             self.assertEqual(amount_posts, 3)
+
+    def test_stale_profile_counter_is_recounted(self):
+        url = reverse('posts:profile', kwargs={'username': 'StasBasov'})
+        for stale in (0, 5, 12, 14, 99):
+            Profile.objects.filter(user=self.user).update(posts_count=stale)
+            with self.subTest(posts_count=stale):
+                page_obj = self.client.get(url + '?page=2').context['page_obj']
+                self.assertEqual(len(page_obj.object_list), 3)
+                self.assertEqual(page_obj.paginator.num_pages, 2)
+
+
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='CursorUser')
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+            for i in range(25)
+        ]
+
+    def test_after_cursor_walks_all_posts_without_count(self):
+        seen = []
+        url = reverse('posts:index') + '?after='
+        response = self.client.get(url)
+        while True:
+            page_obj = response.context['page_obj']
+            seen.extend(post.id for post in page_obj)
+            if not page_obj.has_next():
+                break
+            with self.assertNumQueries(1):
+                # Курсорная страница - один запрос без COUNT(*) и OFFSET
+                page = page_obj.paginator.get_page(
+                    after=page_obj.next_cursor)
+                list(page)
+            response = self.client.get(
+                reverse('posts:index') + f'?after={page_obj.next_cursor}'
+            )
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_before_cursor_returns_previous_page(self):
+        first = self.client.get(reverse('posts:index') + '?after=')
+        first_page = first.context['page_obj']
+        second = self.client.get(
+            reverse('posts:index') + f'?after={first_page.next_cursor}'
+        )
+        second_page = second.context['page_obj']
+        self.assertTrue(second_page.has_previous())
+        back = self.client.get(
+            reverse('posts:index')
+            + f'?before={second_page.previous_cursor}'
+        )
+        back_page = back.context['page_obj']
+        self.assertEqual(list(back_page), list(first_page))
+        self.assertFalse(back_page.has_previous())
+        self.assertTrue(back_page.has_next())
+
+    def test_cursor_links_rendered(self):
+        response = self.client.get(reverse('posts:index') + '?after=')
+        page_obj = response.context['page_obj']
+        self.assertContains(response, f'?after={page_obj.next_cursor}')
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('posts:index') + '?after=%%%')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), POSTS_PER_PAGE)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+
+class PageWindowTest(SimpleTestCase):
+    def window(self, number, num_pages):
+        paginator = Paginator(range(num_pages), 1)
+        return page_window(paginator.page(number), 2, 1)
+
+    def test_short_list_shows_every_page(self):
+        self.assertEqual(self.window(3, 7), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_long_list_is_elided_around_current_page(self):
+        self.assertEqual(self.window(1, 5000), [1, 2, 3, None, 5000])
+        self.assertEqual(
+            self.window(2500, 5000),
+            [1, None, 2498, 2499, 2500, 2501, 2502, None, 5000],
+        )
+        self.assertEqual(self.window(5000, 5000),
+                         [1, None, 4998, 4999, 5000])
+
+    def test_window_size_is_bounded(self):
+        for number in range(1, 41):
+            with self.subTest(number=number):
+                self.assertLessEqual(len(self.window(number, 40)), 9)
+
+
+class CachedCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='counted')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', description='Описание', slug='counted'
+        )
+        Post.objects.bulk_create([
+            Post(author=cls.user, text=f'Пост {i}', group=cls.group)
+            for i in range(POSTS_PER_PAGE * 30)
+        ])
+        # bulk_create обходит сигналы, счётчик профиля пересчитываем
+        counters.reconcile()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+        Follow.objects.create(user=self.reader, author=self.user)
+
+    def test_page_links_are_windowed(self):
+        response = self.client.get(reverse('posts:index') + '?page=15')
+        self.assertContains(response, 'page=30')
+        self.assertNotContains(response, 'page=5"')
+        self.assertContains(response, '…')
+
+    def test_count_is_cached_until_posts_change(self):
+        urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count,
+                    POSTS_PER_PAGE * 30,
+                )
+                with self.assertNumQueries(0):
+                    response.context['page_obj'].paginator.__dict__.pop(
+                        'count'
+                    )
+                    response.context['page_obj'].paginator.count
+        Post.objects.create(author=self.user, text='Ещё', group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count,
+                    POSTS_PER_PAGE * 30 + 1,
+                )
+
+    def test_index_cache_key_uses_normalized_page(self):
+        def key(query):
+            response = self.client.get(reverse('posts:index') + query)
+            return response.context['cache_key']
+
+        same = (
+            ('', '?page=1', '?page=abc', '?utm=x'),
+            ('?page=30', '?page=31', '?page=0', '?page=99999'),
+            ('?after=', '?after=broken', '?before=%%%'),
+        )
+        for queries in same:
+            with self.subTest(queries=queries):
+                self.assertEqual({key(query) for query in queries},
+                                 {key(queries[0])})
+        self.assertNotEqual(key('?page=2'), key('?page=1'))
+
+    def test_edit_keeps_cached_counts(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.client.get(url)
+        post = Post.objects.filter(group=self.group).first()
+        post.text = 'Исправленный пост'
+        post.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(
+            [q for q in queries.captured_queries if 'COUNT(' in q['sql']]
+        )
+
+    def test_edit_does_not_reload_group(self):
+        post = Post.objects.filter(group=self.group).first()
+        post.text = 'Исправленный пост'
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        self.assertFalse([
+            q for q in queries.captured_queries
+            if q['sql'].startswith('SELECT "posts_post"."group_id"')
+        ])
+
+    def test_moved_post_updates_both_group_counts(self):
+        other = Group.objects.create(
+            title='Другая', description='Описание', slug='other'
+        )
+        urls = (
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:group_list', args=[other.slug]),
+        )
+        for url in urls:
+            self.client.get(url)
+        post = Post.objects.filter(group=self.group).first()
+        post.group = other
+        post.save()
+        for url, count in zip(urls, (POSTS_PER_PAGE * 30 - 1, 1)):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, count
+                )
+
+    def test_feed_count_changes_on_unfollow(self):
+        url = reverse('posts:follow_index')
+        self.client.get(url)
+        Follow.objects.filter(user=self.reader).delete()
+        response = self.client.get(url)
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class QueryBudgetTest(TestCase):
+    """Число запросов страницы не зависит от количества записей."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='budget-group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+            for i in range(15)
+        ]
+        cls.post = cls.posts[-1]
+        commenters = [
+            User.objects.create_user(username=f'commenter{i}')
+            for i in range(5)
+        ]
+        for commenter in commenters:
+            Comment.objects.create(
+                post=cls.post, author=commenter, text='Комментарий'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_query_budget(self):
+        username = self.author.username
+        # Профиль и пост тратят ещё запрос на ETag для условного GET
+        budgets = {
+            reverse('posts:index'): 4,
+            reverse('posts:group_list', args=[self.group.slug]): 5,
+            reverse('posts:profile', args=[username]): 6,
+            reverse('posts:post_detail', args=[self.post.id]): 5,
+            reverse('posts:post_comments', args=[self.post.id]): 1,
+            reverse('posts:post_create'): 2,
+            reverse('posts:post_edit', args=[self.post.id]): 4,
+            reverse('posts:follow_index'): 4,
+            reverse('posts:search') + '?q=Пост': 5,
+            reverse('posts:search') + '?q=Пост&page=2': 5,
+            reverse('posts:profile_follow', args=[username]): 4,
+            reverse('posts:profile_unfollow', args=[username]): 8,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    self.client.get(url)
+
+    def test_archive_query_budget(self):
+        # Архив отдаётся потоком: запросы идут, пока читается тело ответа
+        self.client.force_login(self.author)
+        url = reverse('posts:profile_archive', args=[self.author.username])
+        budgets = {'csv': 3, 'ndjson': 3, 'zip': 4}
+        for fmt, budget in budgets.items():
+            with self.subTest(format=fmt):
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url, {'format': fmt})
+                    b''.join(response.streaming_content)
+
+    def test_add_comment_query_budget(self):
+        # Ещё один запрос - постановка письма автору в очередь задач
+        with self.settings(JOBS_EAGER=False), self.assertNumQueries(6):
+            self.client.post(
+                reverse('posts:add_comment', args=[self.post.id]),
+                data={'text': 'Ещё комментарий'},
+            )
@@ -0,0 +1,109 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from yatube.settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
+
+# Полный проход по таблице без индекса или сортировка во временном B-дереве
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?\w+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+# Поиск по индексу с условием-диапазоном, например (pub_date<?)
+INDEX_RANGE = re.compile(r'^SEARCH .* USING (COVERING )?INDEX .*[<>]\?\)$')
+
+
+class QueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='plan-group', description='Описание'
+        )
+        # Подписка раньше постов, чтобы они попали в ленту читателя
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        # На одну запись больше страницы: у каждого списка есть вторая
+        for number in range(POSTS_PER_PAGE + 1):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text='Ок')
+            for _ in range(COMMENTS_PER_PAGE + 1)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertNoFullScans(self, url):
+        """Проверяет планы всех SELECT страницы и возвращает их шаги."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        steps = []
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            for step in self.explain(sql):
+                with self.subTest(url=url, sql=sql, step=step):
+                    self.assertNotRegex(step, FULL_SCAN)
+                    self.assertNotIn(TEMP_SORT, step)
+                steps.append(step)
+        return steps
+
+    def test_views_use_indexes(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?after=',
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:group_list', args=[self.group.slug]) + '?after=',
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:profile', args=[self.author.username])
+            + '?after=',
+            reverse('posts:post_detail', args=[self.post.id]),
+            reverse('posts:follow_index'),
+            reverse('posts:follow_index') + '?after=',
+        )
+        for url in urls:
+            self.assertNoFullScans(url)
+
+    def test_second_pages_search_index_range(self):
+        # Курсор берётся с первой страницы, как его получил бы читатель
+        listings = (
+            (reverse('posts:index'), 'page_obj'),
+            (reverse('posts:group_list', args=[self.group.slug]),
+             'page_obj'),
+            (reverse('posts:profile', args=[self.author.username]),
+             'page_obj'),
+            (reverse('posts:follow_index'), 'page_obj'),
+            (reverse('posts:post_comments', args=[self.post.id]),
+             'comments'),
+        )
+        for url, name in listings:
+            first = self.client.get(url + '?after=')
+            cursor = first.context[name].next_cursor
+            with self.subTest(url=url):
+                self.assertIsNotNone(cursor)
+                steps = self.assertNoFullScans(url + '?after=' + cursor)
+                self.assertTrue(
+                    any(INDEX_RANGE.match(step) for step in steps), steps
+                )
+
+    def test_follow_is_unique(self):
+        self.client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader, author=self.author)
+            .count(), 1
+        )
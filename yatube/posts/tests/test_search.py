@@ -0,0 +1,84 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+from yatube.settings import POSTS_PER_PAGE
+from posts import search
+from posts.models import Group, Post, User
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='searcher')
+        cls.group = Group.objects.create(
+            title='Группа',
+            description='Описание',
+            slug='search-group'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse('posts:search')
+
+    def found(self, query):
+        response = self.client.get(self.url, {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_finds_post_by_word(self):
+        post = Post.objects.create(
+            author=self.user, text='Кошки любят рыбу', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Собаки любят кости')
+        self.assertEqual(self.found('кошки'), [post])
+
+    def test_more_relevant_post_goes_first(self):
+        once = Post.objects.create(
+            author=self.user,
+            text='Сегодня про погоду, а ещё про пироги и дождь',
+        )
+        often = Post.objects.create(
+            author=self.user, text='Пироги, пироги и снова пироги'
+        )
+        self.assertEqual(self.found('пироги'), [often, once])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        Post.objects.create(
+            author=self.user, text='<script>alert(1)</script> пароль'
+        )
+        response = self.client.get(self.url, {'q': 'пароль'})
+        content = response.content.decode()
+        self.assertIn('<mark>пароль</mark>', content)
+        self.assertIn('&lt;script&gt;', content)
+        self.assertNotIn('<script>alert', content)
+
+    def test_edited_and_deleted_posts_are_reindexed(self):
+        post = Post.objects.create(author=self.user, text='Старый текст')
+        post.text = 'Новый текст'
+        post.save()
+        self.assertEqual(self.found('старый'), [])
+        self.assertEqual(self.found('новый'), [post])
+        post.delete()
+        self.assertEqual(self.found('новый'), [])
+
+    def test_operators_in_query_are_plain_words(self):
+        post = Post.objects.create(author=self.user, text='NOT a problem')
+        self.assertEqual(self.found('NOT'), [post])
+        self.assertEqual(self.found('"*( OR'), [])
+        self.assertEqual(self.found(''), [])
+
+    def test_results_are_paginated_with_query(self):
+        for i in range(POSTS_PER_PAGE + 3):
+            Post.objects.create(author=self.user, text=f'Пагинация {i}')
+        response = self.client.get(self.url, {'q': 'пагинация'})
+        self.assertEqual(len(response.context['page_obj']), POSTS_PER_PAGE)
+        self.assertContains(response, '?q=%D0%BF%D0%B0%D0%B3%D0%B8')
+        response = self.client.get(self.url, {'q': 'пагинация', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_rebuild_indexes_bulk_created_posts(self):
+        Post.objects.bulk_create([
+            Post(author=self.user, text='Массовая загрузка')
+        ])
+        self.assertEqual(self.found('массовая'), [])
+        search.rebuild()
+        self.assertEqual(len(self.found('массовая')), 1)
@@ -0,0 +1,101 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from jobs.models import Job
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, JOBS_EAGER=False)
+class BackgroundThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        with mock.patch('posts.thumbnails.schedule'):
+            self.post = Post.objects.create(
+                author=self.user,
+                text='Пост с картинкой',
+                image=SimpleUploadedFile(
+                    'small.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            )
+
+    def test_saving_post_with_image_schedules_generation(self):
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            self.post.save()
+        schedule.assert_called_once_with(self.post.image.name)
+
+    def test_repeated_saves_queue_one_job(self):
+        thumbnails.schedule(self.post.image.name)
+        thumbnails.schedule(self.post.image.name)
+        self.assertEqual(
+            Job.objects.filter(name='posts.thumbnails').count(), 1
+        )
+
+    def test_command_queues_existing_images(self):
+        Post.objects.create(author=self.user, text='Без картинки')
+        call_command('queue_thumbnails', stdout=StringIO())
+        jobs = Job.objects.filter(name='posts.thumbnails')
+        self.assertEqual(
+            list(jobs.values_list('args', flat=True)),
+            [json.dumps([self.post.image.name])],
+        )
+
+    def test_request_never_runs_pillow(self):
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            response = self.client.get(reverse('posts:index'))
+        get_image.assert_not_called()
+        # Пока миниатюры нет, показывается исходная картинка,
+        # а рендер ничего не ставит в очередь
+        self.assertContains(response, self.post.image.url)
+        self.assertFalse(Job.objects.filter(name='posts.thumbnails').exists())
+        # Исходник не растягивается в рамку баннера
+        self.assertNotContains(response, 'width="960"')
+
+    def test_generated_thumbnail_is_served(self):
+        thumbnails.generate(self.post.image.name)
+        with mock.patch.object(default.engine, 'get_image') as get_image:
+            response = self.client.get(reverse('posts:index'))
+        get_image.assert_not_called()
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, '/media/cache/')
+
+    def test_generation_refreshes_cached_card(self):
+        url = reverse('posts:profile', args=[self.user.username])
+        self.assertContains(self.client.get(url), self.post.image.url)
+        updated = self.post.updated
+        thumbnails.generate(self.post.image.name)
+        response = self.client.get(url)
+        self.assertNotContains(response, self.post.image.url)
+        self.assertContains(response, '/media/cache/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated, updated)
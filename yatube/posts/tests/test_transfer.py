@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import search, transfer
+from posts.models import Comment, FeedItem, Follow, Group, Post, User
+
+
+class TransferCommandsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', description='Описание', slug='transfer'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост с группой', group=cls.group
+        )
+        cls.plain = Post.objects.create(author=cls.author, text='Без группы')
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ура')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.old_date = timezone.now() - timedelta(days=365)
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=cls.old_date)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def export(self, name='dump.ndjson'):
+        path = os.path.join(self.directory, name)
+        call_command('export_posts', output=path, batch_size=1)
+        return path
+
+    def import_(self, path):
+        out = StringIO()
+        call_command('import_posts', path, batch_size=1, stdout=out)
+        return out.getvalue()
+
+    def test_export_is_ndjson_in_dependency_order(self):
+        with open(self.export()) as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['group', 'post', 'post', 'comment', 'follow'],
+        )
+        self.assertEqual(records[1]['author'], 'author')
+        self.assertEqual(records[1]['group'], 'transfer')
+        self.assertEqual(records[4], {
+            'type': 'follow', 'user': 'reader', 'author': 'author'
+        })
+
+    def test_round_trip_into_empty_database(self):
+        path = self.export('dump.ndjson.gz')
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertFalse(Post.objects.exists())
+
+        output = self.import_(path)
+
+        self.assertIn('строк/с', output)
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text, 'Пост с группой')
+        self.assertEqual(post.group.slug, 'transfer')
+        self.assertEqual(post.pub_date, self.old_date)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.author.profile.posts_count, 2)
+        self.assertFalse(post.author.has_usable_password())
+        reader = User.objects.get(username='reader')
+        self.assertTrue(Follow.objects.filter(
+            user=reader, author=post.author
+        ).exists())
+        self.assertEqual(FeedItem.objects.filter(user=reader).count(), 2)
+        self.assertEqual(len(search.SearchResults('группой')), 1)
+
+    def test_import_twice_skips_existing_rows(self):
+        path = self.export()
+        self.import_(path)
+        self.import_(path)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_stats_count_rows_by_type(self):
+        stats = transfer.import_rows(
+            transfer.export_rows(batch_size=2), batch_size=2
+        )
+        self.assertEqual(
+            {kind: rows for kind, (rows, _) in stats.items()},
+            {'group': 1, 'post': 2, 'comment': 1, 'follow': 1},
+        )
+
+    def test_taken_ids_stop_the_import(self):
+        path = self.export()
+        Comment.objects.all().delete()
+        Post.objects.all().delete()
+        stranger = User.objects.create_user(username='stranger')
+        other = Post.objects.create(
+            id=self.post.pk, author=stranger, text='Чужой пост'
+        )
+        with self.assertRaisesMessage(CommandError, 'уже есть в базе'):
+            self.import_(path)
+        # Комментарии из выгрузки не достались чужому посту
+        self.assertFalse(other.comments.exists())
+
+    def test_import_leaves_auto_dates_enabled(self):
+        transfer.import_rows(transfer.export_rows())
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+        self.assertTrue(Post._meta.get_field('updated').auto_now)
+        self.assertTrue(Comment._meta.get_field('created').auto_now_add)
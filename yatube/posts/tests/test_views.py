@@ -2,7 +2,9 @@ from django.test import Client, TestCase
 from django.urls import reverse
 from django import forms
 from django.core.cache import cache
-from posts.models import Group, Post, User, Follow
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Group, Post, User, Follow, FeedItem
 
 
 class TaskPagesTests(TestCase):
@@ -107,24 +109,29 @@ class CacheTest(TestCase):
         self.guet_client = Client()
 
     def test_chaching_index_page(self):
+        cache.clear()
         response = self.guet_client.get(reverse('posts:index'))
-        self.post = response.content
-        Post.objects.create(
-            text='cachetest',
-            author=CacheTest.author
-        )
-        response_old = self.guet_client.get(reverse('posts:index'))
-        self.old_post = response_old.content
-        Post.objects.filter(
+        with self.assertNumQueries(0):
+            # Повторный запрос отдаётся из кэша без обращения к базе
+            response_cached = self.guet_client.get(reverse('posts:index'))
+        self.assertEqual(response.content, response_cached.content)
+        post = Post.objects.create(
             text='cachetest',
             author=CacheTest.author
         )
-        cache.clear()
         response_new = self.guet_client.get(reverse('posts:index'))
-        old_post = response_old.content
-        self.assertEqual(old_post, self.post)
-        new_post = response_new.content
-        self.assertNotEqual(old_post, new_post)
+        self.assertContains(response_new, 'cachetest')
+        post.delete()
+        response_deleted = self.guet_client.get(reverse('posts:index'))
+        self.assertNotContains(response_deleted, 'cachetest')
+
+    def test_index_cache_depends_on_auth(self):
+        cache.clear()
+        self.guet_client.get(reverse('posts:index'))
+        authorized_client = Client()
+        authorized_client.force_login(CacheTest.author)
+        response = authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Избранные авторы')
 
 
 class FollowTest(TestCase):
@@ -164,3 +171,46 @@ class FollowTest(TestCase):
                     kwargs={'username': self.user2.username}), follow=True)
         self.assertEqual(response.status_code, 200)
         self.assertFalse(self.user2 in self.user1.follower.all())
+
+
+class FollowFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(5)
+        ]
+        for author in cls.authors:
+            Post.objects.create(text=f'Старый пост {author}', author=author)
+
+    def setUp(self):
+        self.client.force_login(self.reader)
+
+    def feed_texts(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return [post.text for post in response.context['page_obj']]
+
+    def test_follow_backfills_and_unfollow_trims_feed(self):
+        author = self.authors[0]
+        self.client.get(reverse('posts:profile_follow', args=[author]))
+        self.assertEqual(self.feed_texts(), [f'Старый пост {author}'])
+        self.client.get(reverse('posts:profile_unfollow', args=[author]))
+        self.assertEqual(self.feed_texts(), [])
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        author = self.authors[1]
+        Follow.objects.create(user=self.reader, author=author)
+        Post.objects.create(text='Свежий пост', author=author)
+        self.assertEqual(self.feed_texts()[0], 'Свежий пост')
+
+    def test_feed_is_read_without_follow_subquery(self):
+        for author in self.authors:
+            Follow.objects.create(user=self.reader, author=author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), len(self.authors))
+        for query in queries.captured_queries:
+            self.assertNotIn('posts_follow', query['sql'])
@@ -0,0 +1,87 @@
+import threading
+
+from django.core.exceptions import SuspiciousFileOperation
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from yatube.settings import POST_IMAGE_WIDTHS
+
+from jobs.queue import enqueue
+from . import cache
+from .images import banner_geometry
+
+# Все варианты миниатюр, которые встречаются в шаблонах постов:
+# баннер и его варианты разной ширины для srcset.
+THUMBNAIL_SIZES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+    *((banner_geometry(width), {'crop': 'center'})
+      for width in POST_IMAGE_WIDTHS),
+)
+
+_local = threading.local()
+
+
+class BackgroundThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который не запускает Pillow в запросе.
+
+    Готовая миниатюра берётся из хранилища ключей; если её ещё нет,
+    шаблон получает исходную картинку. Генерацию ставит в очередь
+    сохранение поста, а не рендер: чтение не должно писать в базу.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if getattr(_local, 'generating', False) or not file_:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        source = ImageFile(file_)
+        options = self._full_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        cached = default.kvstore.get(ImageFile(name, default.storage))
+        return cached or source
+
+    def _full_options(self, source, options):
+        # Те же умолчания, что подставляет ThumbnailBackend.get_thumbnail,
+        # иначе имя файла миниатюры не совпадёт с созданным в фоне.
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+
+def generate(name):
+    """Создаёт все варианты миниатюр для картинки из хранилища.
+
+    Ошибки не глотаются: задача очереди повторит генерацию позже.
+    """
+    try:
+        if not default.storage.exists(name):
+            return
+    except SuspiciousFileOperation:
+        # Путь вне MEDIA_ROOT - такую картинку не обрабатываем
+        return
+    _local.generating = True
+    try:
+        for geometry, options in THUMBNAIL_SIZES:
+            default.backend.get_thumbnail(name, geometry, **options)
+    finally:
+        _local.generating = False
+    # Во фрагментах кэша могли остаться ссылки на исходную картинку
+    cache.bump_generation(cache.card_version_key('image', name))
+    cache.bump_generation()
+
+
+def schedule(name):
+    """Ставит генерацию миниатюр в очередь фоновых задач.
+
+    Повторные сохранения поста не плодят задачи: пока задача с тем же
+    ключом ждёт в очереди, новая не ставится.
+    """
+    enqueue('posts.thumbnails', name, key=f'thumbnails:{name}')
@@ -0,0 +1,254 @@
+import itertools
+import json
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Case, When
+from django.utils.dateparse import parse_datetime
+
+from . import cache, counters, feed, search
+from .models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 1000
+# Сколько строк за раз получают даты одним UPDATE ... CASE
+DATES_BATCH_SIZE = 200
+
+# Порядок важен: при импорте группы и посты должны появиться раньше
+# ссылающихся на них записей.
+EXPORTS = (
+    ('group', Group.objects.order_by('pk'),
+     ('slug', 'title', 'description')),
+    ('post', Post.objects.order_by('pk'),
+     ('id', 'author__username', 'group__slug', 'text', 'pub_date',
+      'updated', 'image')),
+    ('comment', Comment.objects.order_by('pk'),
+     ('id', 'post_id', 'author__username', 'text', 'created')),
+    ('follow', Follow.objects.order_by('pk'),
+     ('user__username', 'author__username')),
+)
+DATE_FIELDS = ('pub_date', 'updated', 'created')
+RENAMED = {
+    'author__username': 'author',
+    'user__username': 'user',
+    'group__slug': 'group',
+    'post_id': 'post',
+}
+
+
+def export_rows(batch_size=BATCH_SIZE):
+    """Строки NDJSON со всеми группами, постами, комментариями, подписками.
+
+    Записи читаются итератором пачками по batch_size, поэтому память
+    не растёт с размером таблиц.
+    """
+    for kind, queryset, fields in EXPORTS:
+        rows = queryset.values_list(*fields).iterator(chunk_size=batch_size)
+        for row in rows:
+            record = {'type': kind}
+            for field, value in zip(fields, row):
+                if hasattr(value, 'isoformat'):
+                    value = value.isoformat()
+                record[RENAMED.get(field, field)] = value
+            yield json.dumps(record, ensure_ascii=False)
+
+
+class ImportConflict(ValueError):
+    """id из выгрузки уже занят в базе другой записью."""
+
+
+def _check_conflicts(model, records, fields):
+    """id из records, которые уже есть в базе с теми же данными.
+
+    Если запись с таким id отличается по fields, загрузка
+    останавливается: иначе ссылки на неё (комментарии к посту)
+    достались бы чужой записи.
+    """
+    existing = {
+        row[0]: row[1:] for row in model.objects.filter(
+            pk__in=[record['id'] for record in records]
+        ).values_list('pk', *fields)
+    }
+    for record in records:
+        if record['id'] not in existing:
+            continue
+        stored = existing[record['id']]
+        expected = tuple(
+            parse_datetime(record[key]) if key in DATE_FIELDS
+            else record[key]
+            for key in (RENAMED.get(field, field) for field in fields)
+        )
+        if stored != expected:
+            raise ImportConflict(
+                f'{model._meta.model_name} с id {record["id"]} '
+                f'уже есть в базе и не совпадает с выгрузкой'
+            )
+    return set(existing)
+
+
+def _set_dates(model, records, fields):
+    """Проставляет даты из выгрузки: bulk_create заменил бы их на now()."""
+    for start in range(0, len(records), DATES_BATCH_SIZE):
+        chunk = records[start:start + DATES_BATCH_SIZE]
+        model.objects.filter(
+            pk__in=[record['id'] for record in chunk]
+        ).update(**{
+            field: Case(*(
+                When(pk=record['id'], then=parse_datetime(record[field]))
+                for record in chunk
+            ))
+            for field in fields
+        })
+
+
+def _user_ids(usernames):
+    """id пользователей по именам; недостающие создаются без пароля."""
+    usernames = set(usernames)
+    found = dict(
+        User.objects.filter(username__in=usernames)
+        .values_list('username', 'pk')
+    )
+    missing = usernames - set(found)
+    if missing:
+        User.objects.bulk_create(
+            [User(username=name, password=make_password(None))
+             for name in missing],
+            ignore_conflicts=True,
+        )
+        found.update(
+            User.objects.filter(username__in=missing)
+            .values_list('username', 'pk')
+        )
+    return found
+
+
+class Importer:
+    def __init__(self):
+        self.group_ids = {}
+
+    def groups(self, records):
+        Group.objects.bulk_create(
+            [Group(slug=record['slug'], title=record['title'],
+                   description=record['description'])
+             for record in records],
+            ignore_conflicts=True,
+        )
+        self.group_ids.update(
+            Group.objects.filter(
+                slug__in=[record['slug'] for record in records]
+            ).values_list('slug', 'pk')
+        )
+
+    def _group_id(self, slug):
+        if slug is None:
+            return None
+        if slug not in self.group_ids:
+            group = Group.objects.filter(slug=slug).first()
+            self.group_ids[slug] = group.pk if group else None
+        return self.group_ids[slug]
+
+    def posts(self, records):
+        existing = _check_conflicts(
+            Post, records, ('author__username', 'pub_date')
+        )
+        records = [record for record in records
+                   if record['id'] not in existing]
+        users = _user_ids(record['author'] for record in records)
+        Post.objects.bulk_create(
+            [Post(id=record['id'], author_id=users[record['author']],
+                  group_id=self._group_id(record['group']),
+                  text=record['text'],
+                  image=record['image'] or '')
+             for record in records],
+        )
+        _set_dates(Post, records, ('pub_date', 'updated'))
+
+    def comments(self, records):
+        existing = _check_conflicts(
+            Comment, records, ('post_id', 'author__username', 'created')
+        )
+        posts = set(Post.objects.filter(
+            pk__in=[record['post'] for record in records]
+        ).values_list('pk', flat=True))
+        # Комментарии к постам, которых нет в базе, пропускаются
+        records = [record for record in records
+                   if record['id'] not in existing
+                   and record['post'] in posts]
+        users = _user_ids(record['author'] for record in records)
+        Comment.objects.bulk_create(
+            [Comment(id=record['id'], post_id=record['post'],
+                     author_id=users[record['author']],
+                     text=record['text'])
+             for record in records],
+        )
+        _set_dates(Comment, records, ('created',))
+
+    def follows(self, records):
+        users = _user_ids(itertools.chain.from_iterable(
+            (record['user'], record['author']) for record in records
+        ))
+        Follow.objects.bulk_create(
+            [Follow(user_id=users[record['user']],
+                    author_id=users[record['author']])
+             for record in records if record['user'] != record['author']],
+            ignore_conflicts=True,
+        )
+
+
+def import_rows(lines, batch_size=BATCH_SIZE):
+    """Загружает строки NDJSON пачками, каждая пачка - своя транзакция.
+
+    Уже загруженные записи пропускаются, так что выгрузку можно загрузить
+    повторно; если id поста или комментария занят другой записью,
+    поднимается ImportConflict. Возвращает {тип: (строк, секунд)}.
+    """
+    importer = Importer()
+    handlers = {
+        'group': importer.groups,
+        'post': importer.posts,
+        'comment': importer.comments,
+        'follow': importer.follows,
+    }
+    stats = {}
+    records = (json.loads(line) for line in lines if line.strip())
+    for kind, group in itertools.groupby(records, lambda r: r['type']):
+        if kind not in handlers:
+            raise ValueError(f'Неизвестный тип записи: {kind}')
+        while True:
+            batch = list(itertools.islice(group, batch_size))
+            if not batch:
+                break
+            started = time.perf_counter()
+            with transaction.atomic():
+                handlers[kind](batch)
+            rows, elapsed = stats.get(kind, (0, 0.0))
+            stats[kind] = (
+                rows + len(batch),
+                elapsed + time.perf_counter() - started,
+            )
+    _reset_sequences()
+    rebuild_derived()
+    return stats
+
+
+def _reset_sequences():
+    # Посты и комментарии пришли со своими id; в SQLite запросов нет
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Post, Comment]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def rebuild_derived():
+    """Пересобирает всё, что при bulk_create не обновили сигналы."""
+    counters.reconcile()
+    feed.rebuild()
+    search.rebuild()
+    cache.bump_generation()
+    cache.bump_generation(cache.count_generation_key('index'))
+    cache.bump_generation(cache.count_generation_key('feeds'))
+    for group_id in Group.objects.values_list('pk', flat=True).iterator():
+        cache.bump_generation(cache.count_generation_key('group', group_id))
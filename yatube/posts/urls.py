@@ -10,6 +10,9 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
+    # Выгрузка своих записей
+    path('profile/<str:username>/archive/', views.profile_archive,
+         name='profile_archive'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     # Создание поста
@@ -20,6 +23,12 @@ urlpatterns = [
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
+    # Следующая страница комментариев
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
+    # Поиск
+    path('search/', views.search, name='search'),
     # Подписки
     path('follow/', views.follow_index, name='follow_index'),
     path(
@@ -1,25 +1,58 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
 from django.shortcuts import redirect, render, get_object_or_404
-from yatube.settings import POSTS_PER_PAGE
-from .models import Post, Group, User, Comment, Follow
+from django.views.decorators.http import condition
+from yatube.settings import (COMMENTS_PER_PAGE, COUNT_CACHE_TIMEOUT,
+                             INDEX_CACHE_TIMEOUT, PAGINATION_MODE,
+                             POSTS_PER_PAGE)
+
+from core.throttle import throttle
+from . import archive, cache, etags
+from .models import Comment, Post, Group, User, Follow, FeedItem
 from .forms import PostForm, CommentForm
+from .paginators import (CachedCountPaginator, CursorPaginator,
+                         InvalidCursor, KnownCountPaginator, lazy_page)
+from .search import SearchResults
 
 
+@condition(etag_func=etags.index)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginate(request, post_list)
+    post_list = Post.objects.select_related('author', 'group')
+    # Ключ фрагмента меняется с каждым новым или удалённым постом,
+    # поэтому кэш можно держать долго, не показывая устаревшую ленту.
+    generation = cache.generation()
+    count_key = cache.count_key(
+        'index', cache.generation(cache.count_generation_key('index'))
+    )
+    cache_key = ':'.join(str(part) for part in (
+        generation,
+        request.user.is_authenticated,
+        *page_key(request, post_list, count_key),
+    ))
+    # При попадании в кэш шаблон не обращается к странице,
+    # и запросы к базе не выполняются вовсе.
+    lazy = cache.fragment_cached('index_page', cache_key)
+    page_obj = paginate(request, post_list, lazy=lazy, count_key=count_key)
 
     context = {
         'page_obj': page_obj,
+        'cache_key': cache_key,
+        'cache_timeout': INDEX_CACHE_TIMEOUT,
     }
     return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=etags.group_posts)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.group_name.all()
-    page_obj = paginate(request, post_list)
+    post_list = group.group_name.select_related('author')
+    page_obj = paginate(request, post_list, count_key=cache.count_key(
+        'group', group.pk,
+        cache.generation(cache.count_generation_key('group', group.pk)),
+    ))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -27,43 +60,101 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=etags.profile)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=user)
-    page_obj = paginate(request, posts)
+    user = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    posts = user.posts.select_related('group')
+    # Число постов автора уже есть в счётчике профиля; профиля может
+    # не быть у пользователя, созданного в обход сигналов
+    count = user.profile.posts_count if hasattr(user, 'profile') else None
+    page_obj = paginate(request, posts, count=count)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=user
     ).exists()
     context = {
         'author': user,
-        'posts_count': posts.count(),
         'page_obj': page_obj,
         'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+ARCHIVE_FORMATS = {
+    'csv': (archive.csv_chunks, 'text/csv; charset=utf-8'),
+    'ndjson': (archive.ndjson_chunks, 'application/x-ndjson'),
+    'zip': (archive.zip_chunks, 'application/zip'),
+}
+
+
+@login_required
+def profile_archive(request, username):
+    if request.user.username != username:
+        return redirect('posts:profile', username=username)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in ARCHIVE_FORMATS:
+        fmt = 'csv'
+    chunks, content_type = ARCHIVE_FORMATS[fmt]
+    # Архив собирается по мере отдачи и не держится в памяти целиком
+    response = StreamingHttpResponse(
+        chunks(request.user), content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{username}-posts.{fmt}"'
+    )
+    return response
+
+
+@condition(etag_func=etags.post_detail)
 def post_detail(request, post_id):
-    post = Post.objects.get(id=post_id)
-    post_count = Post.objects.filter(author=post.author).count()
-    comments = Comment.objects.filter(post=post)
-    form = CommentForm(request.POST or None)
-    if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
-        return redirect('posts:post_detail', post_id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'), id=post_id
+    )
+    comments = comments_page(post.id, request.GET.get('comments_after'))
+    # Форма отправляется в add_comment: там вход и ограничение частоты
     context = {
         'post': post,
-        'post_count': post_count,
         'comments': comments,
-        'form': form,
+        'form': CommentForm(),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    """Фрагмент со следующей страницей комментариев для «Показать ещё»."""
+    comments = comments_page(post_id, request.GET.get('after'))
+    # Раз комментарии нашлись, пост точно есть; иначе проверяем отдельно
+    if not comments:
+        get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {'post_id': post_id, 'comments': comments}
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def comments_page(post_id, after):
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author'
+    )
+    paginator = CursorPaginator(
+        comments, COMMENTS_PER_PAGE, ordering=('created', 'id')
+    )
+    return paginator.get_page(after=after)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(SearchResults(query), POSTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@throttle('post_create', methods=('POST',))
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST' and form.is_valid():
@@ -95,6 +186,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@throttle('comment', methods=('POST',))
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -108,16 +200,26 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    following_authors = User.objects.filter(
-        following__user=request.user
-    ).values_list('id', flat=True)
-    posts = Post.objects.filter(author__in=following_authors)
-    page_obj = paginate(request, posts)
+    feed = FeedItem.objects.filter(user=request.user).select_related(
+        'post__author', 'post__group'
+    )
+    # post_id уже делает порядок строгим в ленте одного пользователя;
+    # лишний id в курсоре не даёт искать по индексу диапазоном
+    page_obj = paginate(
+        request, feed, ordering=('-pub_date', '-post_id'),
+        count_key=cache.count_key(
+            'feed', request.user.pk,
+            cache.generation(cache.count_generation_key('feeds')),
+            cache.generation(cache.feed_generation_key(request.user.pk)),
+        ),
+    )
+    page_obj.object_list = [item.post for item in page_obj.object_list]
     context = {'page_obj': page_obj}
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@throttle('follow')
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user == author:
@@ -127,14 +229,64 @@ def profile_follow(request, username):
 
 
 @login_required
+@throttle('follow')
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
 
 
-def paginate(request, queryset):
-    paginator = Paginator(queryset, POSTS_PER_PAGE)
+def page_key(request, queryset, count_key):
+    """Страница, которую покажет paginate, - для ключа кэша.
+
+    Номер и курсоры приводятся к тому, что пагинатор из них поймёт:
+    произвольные значения в запросе не плодят записи в кэше.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after is not None or before is not None or (
+        PAGINATION_MODE == 'cursor'
+    ):
+        paginator = CursorPaginator(queryset, POSTS_PER_PAGE)
+        try:
+            return ('cursor', *(
+                paginator.decode_cursor(token) if token else None
+                for token in (after, before)
+            ))
+        except InvalidCursor:
+            return ('cursor', None, None)
+    paginator = CachedCountPaginator(
+        queryset, POSTS_PER_PAGE, count_key, COUNT_CACHE_TIMEOUT
+    )
+    # Те же правила, что у Paginator.get_page
+    try:
+        return ('page', paginator.validate_number(request.GET.get('page')))
+    except PageNotAnInteger:
+        return ('page', 1)
+    except EmptyPage:
+        return ('page', paginator.num_pages)
+
+
+def paginate(request, queryset, lazy=False, count_key=None, count=None,
+             ordering=None):
+    # Пустой ?after= открывает первую страницу в курсорном режиме
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if after is not None or before is not None or (
+        PAGINATION_MODE == 'cursor'
+    ):
+        paginator = CursorPaginator(queryset, POSTS_PER_PAGE, ordering)
+        return paginator.get_page(after=after, before=before)
+    if count is not None:
+        paginator = KnownCountPaginator(queryset, POSTS_PER_PAGE, count)
+    elif count_key is None:
+        paginator = Paginator(queryset, POSTS_PER_PAGE)
+    else:
+        paginator = CachedCountPaginator(
+            queryset, POSTS_PER_PAGE, count_key, COUNT_CACHE_TIMEOUT
+        )
     page_number = request.GET.get('page')
+    if lazy:
+        return lazy_page(paginator, page_number)
     page_obj = paginator.get_page(page_number)
     return page_obj
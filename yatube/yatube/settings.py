@@ -26,6 +26,31 @@ ALLOWED_HOSTS = [
 # Application definition
 
 POSTS_PER_PAGE = 10
+# 'pages' - нумерованные страницы (OFFSET), 'cursor' - переход по курсору
+# (?after=/?before=) без COUNT(*) и с одинаковой ценой любой страницы.
+PAGINATION_MODE = 'pages'
+# Комментарии под постом выводятся порциями по курсору (created, id)
+COMMENTS_PER_PAGE = 20
+# Сколько номеров страниц показывать вокруг текущей и у краёв списка.
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+# Ограничение частоты записи (core.throttle): корзины токенов на
+# пользователя и на IP. '10/m' - до десяти запросов подряд, дальше по
+# одному в 6 секунд. IP-лимиты выше: за одним адресом бывает много людей.
+THROTTLE_RATES = {
+    'post_create': {'user': '10/m', 'ip': '30/m'},
+    'comment': {'user': '20/m', 'ip': '60/m'},
+    'follow': {'user': '30/m', 'ip': '90/m'},
+}
+# Сколько обратных прокси стоит перед сайтом. Без них IP-корзина
+# считается по REMOTE_ADDR; за прокси это адрес самого прокси, и все
+# анонимы делили бы одну корзину, поэтому адрес берётся из
+# X-Forwarded-For. Больше реального числа ставить нельзя: клиент сможет
+# подделать адрес.
+THROTTLE_TRUSTED_PROXIES = int(os.getenv('THROTTLE_TRUSTED_PROXIES', '0'))
+# Размер страницы JSON API по умолчанию и предел для ?limit= и ?ids=
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -38,18 +63,52 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Замеры запросов (core.middleware.RequestTimingMiddleware): заголовок
+# Server-Timing, выборочный лог core.timing и лог медленных запросов
+# к базе core.timing.slow. Включается переменной окружения REQUEST_TIMING.
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', 0.01)
+)
+REQUEST_TIMING_SLOW_QUERY_MS = 100
+if os.getenv('REQUEST_TIMING'):
+    MIDDLEWARE.insert(0, 'core.middleware.RequestTimingMiddleware')
+
+# Профилирование запроса сотрудника по ?_profile или заголовку X-Profile
+# (core.middleware.ProfilerMiddleware). Включается переменной окружения
+# PROFILER_ENABLED, файлы .prof пишутся в PROFILER_DIR.
+PROFILER_ENABLED = bool(os.getenv('PROFILER_ENABLED'))
+PROFILER_DIR = os.getenv('PROFILER_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILER_TOP = 30
+if PROFILER_ENABLED:
+    MIDDLEWARE.append('core.middleware.ProfilerMiddleware')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -81,9 +140,48 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами, а не открывается на каждый
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
     }
 }
 
+# PRAGMA для каждого нового соединения с SQLite (core.signals).
+# WAL пускает читателей параллельно с записью, busy_timeout ждёт
+# освобождения блокировки вместо ошибки "database is locked",
+# synchronous=NORMAL в режиме WAL не теряет целостность при сбое.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ, около 20 МБ
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения: пути к копиям базы через запятую в
+# переменной окружения DATABASE_REPLICAS. GET-запросы к приложениям из
+# REPLICA_APPS читают с реплик; после записи пользователь на
+# REPLICA_STICKY_SECONDS закрепляется за основной базой
+# (core.routers.ReplicaRouter и core.middleware.ReplicaRoutingMiddleware).
+# Прочитанное с реплики не попадает в общий кэш фрагментов
+# (core.cache.fragments) и не получает ETag.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(','))
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_APPS = ('posts',)
+REPLICA_STICKY_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -134,12 +232,87 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+# collectstatic собирает файлы с хешем в имени и сжатыми копиями
+# (.gz, .br при установленном brotli); отдаёт их StaticFilesMiddleware.
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Срок кэширования статики без хеша в имени
+STATIC_MAX_AGE = 60 * 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры создаются фоновой задачей после сохранения поста,
+# в запросе шаблон только берёт готовую из хранилища ключей.
+THUMBNAIL_BACKEND = 'posts.thumbnails.BackgroundThumbnailBackend'
+
+# Фоновые задачи (приложение jobs): лента подписчиков, поиск, миниатюры
+# и письма о комментариях. Задачи хранятся в базе, выполняет их
+# manage.py run_jobs в пуле из JOBS_WORKERS потоков. Упавшая задача
+# повторяется до JOBS_MAX_ATTEMPTS раз с паузой JOBS_BACKOFF * 2**n
+# секунд, но не больше JOBS_BACKOFF_MAX. Задача, взятая дольше
+# JOBS_LOCK_TIMEOUT секунд назад, считается брошенной и возвращается
+# в очередь. JOBS_EAGER=1 выполняет задачи сразу, без воркера;
+# так настроены тесты (yatube/settings_test.py).
+JOBS_EAGER = os.getenv('JOBS_EAGER', '0') == '1'
+JOBS_WORKERS = 4
+JOBS_POLL_INTERVAL = 1.0
+JOBS_MAX_ATTEMPTS = 5
+JOBS_BACKOFF = 10
+JOBS_BACKOFF_MAX = 60 * 60
+JOBS_LOCK_TIMEOUT = 10 * 60
+
+# Загруженные картинки постов уменьшаются до POST_IMAGE_MAX_SIZE по
+# большей стороне и пересохраняются без EXIF. POST_IMAGE_WIDTHS - ширины
+# вариантов баннера для srcset.
+POST_IMAGE_MAX_SIZE = 2048
+POST_IMAGE_QUALITY = 82
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+# Предел кадры x ширина x высота для анимации: каждый кадр распаковывается
+# целиком, и маленький файл с тысячами кадров занял бы гигабайты.
+# Анимация больше предела сохраняется первым кадром.
+POST_IMAGE_MAX_ANIMATION_PIXELS = 64 * 1024 * 1024
+
+# Бэкенд кэша выбирается переменной окружения CACHE_BACKEND.
+# locmem - свой кэш в каждом процессе, годится для разработки и тестов;
+# file и sqlite - общий кэш для всех воркеров на машине без внешних
+# сервисов; redis - общий кэш для нескольких машин (нужен django-redis).
+# Поколения постов, ETag и корзины ограничений живут в кэше и должны
+# быть общими для всех воркеров, поэтому по умолчанию берётся sqlite.
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': (
+        'django.core.cache.backends.filebased.FileBasedCache',
+        os.path.join(BASE_DIR, 'cache'),
+    ),
+    'sqlite': (
+        'core.cache.sqlite.SQLiteCache',
+        os.path.join(BASE_DIR, 'cache.sqlite3'),
+    ),
+    'redis': ('django_redis.cache.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+CACHE_NAME = os.getenv('CACHE_BACKEND', 'sqlite')
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[CACHE_NAME]
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_LOCATION),
+    },
+    # Тег {% cache %} пишет сюда; фрагменты лежат в default
+    'template_fragments': {
+        'BACKEND': 'core.cache.fragments.PrimaryFragmentCache',
+        'LOCATION': 'default',
+    },
 }
+
+# Фрагмент главной страницы и число записей в списках сбрасываются
+# сменой поколения постов, поэтому с общим кэшем живут долго. В locmem
+# поколение меняется только в процессе, где была запись: остальные
+# процессы увидят изменения не позже чем через 20 секунд.
+SHARED_CACHE = CACHE_NAME != 'locmem'
+INDEX_CACHE_TIMEOUT = 60 * 60 * 24 if SHARED_CACHE else 20
+COUNT_CACHE_TIMEOUT = 60 * 60 * 24 if SHARED_CACHE else 20
+# Карточки постов в списках: ключ меняется с правкой поста, автора,
+# группы или картинки, версии которых тоже лежат в кэше.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24 if SHARED_CACHE else 20
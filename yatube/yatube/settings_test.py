@@ -0,0 +1,9 @@
+import os
+
+# Воркера в тестах нет, а кэш не должен переживать прогон. Переменные
+# окружения по-прежнему главнее: CACHE_BACKEND=sqlite pytest проверит
+# общий кэш.
+os.environ.setdefault('JOBS_EAGER', '1')
+os.environ.setdefault('CACHE_BACKEND', 'locmem')
+
+from yatube.settings import *  # noqa: E402,F401,F403